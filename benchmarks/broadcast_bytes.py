@@ -0,0 +1,101 @@
+"""Bytes sent per code announcement broadcast, attaching the thumbnail vs. uploading it once
+
+Usage: python -m benchmarks.broadcast_bytes [--guilds 5000]
+
+Runs the wiki code announcement through `Broadcast` against fake channels that record the size of every request:
+the JSON payload (content, embed, components) plus the attached files. `attachment` mode attaches the thumbnail to
+every message, `upload` mode uploads it once to an asset channel and references its CDN URL.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("ENV", "dev")
+os.environ["MONGODB_BACKEND"] = "mongomock"
+
+import discord
+from zenox.auto_tasks.wikiCodes import wikiCodes
+from zenox.bot.broadcast import Broadcast
+from zenox.bot.uploads import AssetUploader
+from zenox.db.structures import Code
+from zenox.static.constants import ZENOX_LOCALES
+from zenox.static.enums import Game
+from zenox.static.ratelimit import TokenBucket
+from zenox.ui.components import View, Button
+
+ASSET_CHANNEL = 1
+
+class Meter:
+    def __init__(self):
+        self.requests = 0
+        self.payload = 0
+        self.files = 0
+
+class Message:
+    def __init__(self, files: list[discord.File]):
+        expires = format(int(time.time()) + 86400, "x")
+        self.attachments = [
+            type("Attachment", (), {"url": f"https://cdn.discordapp.com/attachments/1/2/{file.filename}?ex={expires}&is=0&hm=0"})
+            for file in files
+        ]
+
+class Channel:
+    def __init__(self, meter: Meter):
+        self.meter = meter
+
+    async def send(self, content: str | None = None, *, embed: discord.Embed | None = None, view: View | None = None, file: discord.File | None = None, files: list[discord.File] | None = None) -> Message:
+        files = [file] if file else files or []
+        payload = {"content": content, "embeds": [embed.to_dict()] if embed else [], "components": view.to_components() if view else []}
+        self.meter.requests += 1
+        self.meter.payload += len(json.dumps(payload).encode())
+        self.meter.files += sum(f.fp.getbuffer().nbytes for f in files)
+        return Message(files)
+
+class Client:
+    def __init__(self, meter: Meter, asset_channel: int | None):
+        self.channel = Channel(meter)
+        self.uploads = AssetUploader(self, asset_channel)
+
+    def get_channel(self, channel_id: int) -> Channel:
+        return self.channel
+
+    def capture_exception(self, e: Exception) -> None:
+        raise e
+
+async def broadcast(guilds: list[discord.Locale], asset_channel: int | None) -> Meter:
+    meter = Meter()
+    client = Client(meter, asset_channel)
+    game = Game.GENSHIN
+    codes = [Code(game, code) for code in ("GENSHINGIFT", "BENCHMARK1", "BENCHMARK2")]
+    translations = wikiCodes._pre_translate(game, codes, [])
+    view = View(author=None, locale=discord.Locale.american_english)
+    for code in codes:
+        view.add_item(Button(label=code.code, url="https://genshin.hoyoverse.com/gift?code=" + code.code))
+    embeds, thumbnail_files = await client.uploads.thumbnail(game, {language: translations[language]["embed"] for language in translations})
+
+    async def send(broadcast: Broadcast[discord.Locale], language: discord.Locale) -> str:
+        await broadcast.send(client.get_channel(0), content=translations[language]["content"], embed=embeds[language], files=thumbnail_files(), view=view)
+        return "success"
+
+    await Broadcast(client, bucket=TokenBucket(1_000_000)).run(guilds, send)
+    return meter
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--guilds", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    guilds = [rng.choice(list(ZENOX_LOCALES)) for _ in range(args.guilds)]
+    results = {mode: await broadcast(guilds, channel) for mode, channel in (("attachment", None), ("upload", ASSET_CHANNEL))}
+
+    print(f"{'mode':<12}{'requests':>10}{'payload KiB':>14}{'files KiB':>12}{'total KiB':>12}{'bytes/guild':>13}")
+    for mode, meter in results.items():
+        total = meter.payload + meter.files
+        print(f"{mode:<12}{meter.requests:>10}{meter.payload / 1024:>14.0f}{meter.files / 1024:>12.0f}{total / 1024:>12.0f}{total / args.guilds:>13.0f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
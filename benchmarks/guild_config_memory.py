@@ -0,0 +1,119 @@
+"""Memory held by cached GuildConfig objects
+
+Usage: python -m benchmarks.guild_config_memory [--guilds 50000] [--baseline]
+
+Hydrates `--guilds` guild documents into the GuildConfig cache against an in-memory database and reports the
+memory they retain, measured with tracemalloc. Documents mirror production: mostly defaults, some configured
+channels, flags and partner data.
+
+`--baseline` caches the representation from before GuildConfig was slotted instead (an instance dict per object,
+a dict per game, feature and flag lists, a copied dict per event reminder config), to reproduce the before/after
+numbers. Both modes index the guilds in SUBSCRIPTIONS, so only the config objects differ.
+"""
+import argparse
+import gc
+import os
+import random
+import tracemalloc
+from typing import Any
+
+os.environ.setdefault("ENV", "dev")
+os.environ["MONGODB_BACKEND"] = "mongomock"
+
+import discord
+from zenox.db.cache import TTLCache
+from zenox.db.structures import GuildConfig
+from zenox.db.subscriptions import SUBSCRIPTIONS
+from zenox.static.constants import DatabaseKey
+from zenox.static.enums import Game
+
+class BaselineCodesConfig:
+    def __init__(self, config: dict[str, Any]):
+        self.channel = config["channel"]
+        self.everyone_ping = config["everyone_ping"]
+        self.role_ping = config["role_ping"]
+        self.stream_codes = config["stream_codes"]
+        self.all_codes = config["all_codes"]
+
+class BaselineEventReminderConfig:
+    def __init__(self, config: dict[str, bool]):
+        self.config = {key: item for key, item in config.items()}
+
+class BaselinePartnerData:
+    def __init__(self, data: dict[str, str | None]):
+        self.inviteUrl = data["inviteUrl"]
+        self.guildName = data["guildName"]
+        self.guildMemberCount = data["guildMemberCount"]
+        self.guildDescription = data["guildDescription"]
+
+class BaselineGuildConfig:
+    """GuildConfig as it was cached before `__slots__`, `PerGame` and interned feature and flag tuples"""
+    cache: TTLCache[int, "BaselineGuildConfig"] = TTLCache("guilds_baseline", maxsize=1, ttl=3600)
+
+    @classmethod
+    def _from_document(cls, gld: dict[str, Any]) -> "BaselineGuildConfig":
+        guild = cls()
+        guild.id = gld["id"]
+        guild.memberCount = gld["memberCount"]
+        guild.features = gld["features"]
+        guild.flags = gld["flags"]
+        guild.language = discord.Locale(gld["language"])
+        guild.executed_help = gld["executed_help"]
+        guild.pending_deletion = gld["pending_deletion"]
+        guild.codes_config = {game: BaselineCodesConfig(gld[DatabaseKey[game]]["codes_config"]) for game in Game}
+        guild.event_reminders = {game: BaselineEventReminderConfig(gld[DatabaseKey[game]]["event_reminders"]) for game in Game}
+        guild.partnerData = BaselinePartnerData(gld["partnerData"])
+        cls.cache[guild.id] = guild
+        SUBSCRIPTIONS.update_document(gld)
+        return guild
+
+def make_document(guild_id: int, rng: random.Random) -> dict:
+    document = GuildConfig._document(guild_id)
+    document["memberCount"] = rng.randint(2, 50000)
+    document["language"] = rng.choice(["en-US", "en-US", "en-US", "de", "fr", "es-ES", "pt-BR"])
+    document["executed_help"] = rng.random() < 0.5
+    for game in Game:
+        if rng.random() < 0.3:
+            document[DatabaseKey[game]]["codes_config"]["channel"] = rng.getrandbits(60)
+            document[DatabaseKey[game]]["codes_config"]["role_ping"] = rng.getrandbits(60) if rng.random() < 0.3 else None
+    if rng.random() < 0.01:
+        document["flags"] = ["PARTNER_GUILD"]
+        document["partnerData"] = {
+            "inviteUrl": "https://discord.gg/" + "".join(rng.choices("abcdefghijk", k=8)),
+            "guildName": f"Guild {guild_id}",
+            "guildMemberCount": document["memberCount"],
+            "guildDescription": "A partnered community"
+        }
+    return document
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--guilds", type=int, default=50000)
+    parser.add_argument("--baseline", action="store_true", help="cache the representation from before slotting")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    documents = [make_document(guild_id, rng) for guild_id in range(args.guilds)]
+    structure = BaselineGuildConfig if args.baseline else GuildConfig
+    structure.cache.maxsize = args.guilds
+    structure._from_document(make_document(-1, rng)) # Warm up lazy imports and the database client
+    structure.cache.clear()
+    SUBSCRIPTIONS.remove(-1)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for document in documents:
+        # Copy like a fresh cursor would, so nothing is shared with the source documents
+        structure._from_document({**document, **{key: dict(value) for key, value in document.items() if isinstance(value, dict)}})
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print(f"representation:     {'baseline' if args.baseline else 'current'}")
+    print(f"guilds cached:      {len(structure.cache)}")
+    print(f"memory retained:    {retained / 1024 / 1024:.1f} MiB")
+    print(f"bytes per guild:    {retained / args.guilds:.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Wiki code extraction: correctness, parse throughput, allocations and end-to-end execute time
+
+Usage: python -m benchmarks.wiki_codes [--iterations 20] [--json results.json] [--compare baseline.json]
+
+Runs against the snapshots in benchmarks/snapshots/wiki (see benchmarks.wiki_snapshots), never against fandom.
+Every page is parsed with `wikiCodes._parse` and compared to expected.json, mismatches fail the run. `execute` is
+timed with a fake HTTP session serving the snapshots and an in-memory database: `cold` starts from an empty database,
+`warm` finds every code stored and queued and the pages unchanged, `reparse` is warm with the page cache cleared.
+
+Save a run with `--json` and pass it to `--compare` after a change to print the difference per metric.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("ENV", "dev")
+os.environ["MONGODB_BACKEND"] = "mongomock"
+
+from benchmarks.wiki_snapshots import EXPECTED_PATH, snapshot_path
+from zenox.auto_tasks import wikiCodes as wiki_codes
+from zenox.auto_tasks.wikiCodes import wikiCodes, WIKI_CACHE
+from zenox.db.mongodb import HOYOVERSEDB
+from zenox.db.queue import CODE_QUEUE
+from zenox.db.structures import Code
+from zenox.static.enums import Game
+
+# Metrics where a lower value is better, for the direction shown by --compare
+LOWER_IS_BETTER = ("_ms", "_kib")
+
+class Response:
+    status = 200
+    headers: dict[str, str] = {}
+
+    def __init__(self, html: str):
+        self.html = html
+
+    async def __aenter__(self) -> "Response":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+    def raise_for_status(self) -> None:
+        pass
+
+    async def text(self) -> str:
+        return self.html
+
+class Session:
+    def __init__(self, pages: dict[str, str]):
+        self.pages = pages
+
+    def get(self, url: str, **kwargs) -> Response:
+        return Response(self.pages[url])
+
+class Client:
+    log_webhook_url = ""
+
+    def __init__(self, pages: dict[str, str]):
+        self.session = Session(pages)
+        self.errors: list[Exception] = []
+
+    def capture_exception(self, e: Exception) -> None:
+        self.errors.append(e)
+
+async def no_webhook(*args, **kwargs) -> None:
+    pass
+
+def check(pages: dict[Game, str], expected: dict[str, list[dict]]) -> list[str]:
+    mismatches = []
+    for game, html in pages.items():
+        records = [{**record._asdict(), "codes": list(record.codes)} for record in wikiCodes._parse(html)]
+        if len(records) != len(expected[game.name]):
+            mismatches.append(f"{game.name}: {len(records)} rows, expected {len(expected[game.name])}")
+        for i, (record, want) in enumerate(zip(records, expected[game.name])):
+            if record != want:
+                mismatches.append(f"{game.name} row {i}: {record} != {want}")
+    return mismatches
+
+def bench_parse(pages: dict[Game, str], iterations: int) -> dict[str, float]:
+    results = {}
+    for game, html in pages.items():
+        rows = len(wikiCodes._parse(html))
+        start = time.perf_counter()
+        for _ in range(iterations):
+            wikiCodes._parse(html)
+        elapsed = (time.perf_counter() - start) / iterations
+
+        gc.collect()
+        tracemalloc.start()
+        records = wikiCodes._parse(html)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del records
+
+        key = game.name.lower()
+        results[f"{key}_parse_ms"] = elapsed * 1000
+        results[f"{key}_rows_per_s"] = rows / elapsed
+        results[f"{key}_peak_kib"] = peak / 1024
+        results[f"{key}_retained_kib"] = retained / 1024
+    return results
+
+async def bench_execute(pages: dict[Game, str]) -> dict[str, float]:
+    from zenox.static.constants import WIKI_PAGES
+    wiki_codes.send_webhook = no_webhook
+    client = Client({WIKI_PAGES[game]: html for game, html in pages.items()})
+
+    def reset(*, database: bool, pages: bool) -> None:
+        if database:
+            HOYOVERSEDB.codes.delete_many({})
+            HOYOVERSEDB.code_queue.delete_many({})
+            CODE_QUEUE.pending = {game: {} for game in Game}
+            for game in Game:
+                Code.cache[game].clear()
+        if pages:
+            WIKI_CACHE._pages.clear()
+
+    async def timed() -> float:
+        start = time.perf_counter()
+        await wikiCodes.execute(client)
+        if client.errors:
+            raise client.errors[0]
+        return (time.perf_counter() - start) * 1000
+
+    results = {}
+    reset(database=True, pages=True)
+    results["execute_cold_ms"] = await timed()
+    reset(database=False, pages=False)
+    results["execute_warm_ms"] = await timed()
+    reset(database=False, pages=True)
+    results["execute_reparse_ms"] = await timed()
+    results["queued_codes"] = sum(CODE_QUEUE.size(game) for game in Game)
+    return results
+
+def compare(results: dict[str, float], baseline: dict[str, float]) -> None:
+    print(f"\n{'metric':<28}{'baseline':>14}{'current':>14}{'change':>10}")
+    for metric, value in results.items():
+        if metric not in baseline:
+            continue
+        before = baseline[metric]
+        change = (value - before) / before * 100 if before else 0.0
+        better = (change < 0) == metric.endswith(LOWER_IS_BETTER)
+        marker = "" if abs(change) < 5 else (" +" if better else " -")
+        print(f"{metric:<28}{before:>14.2f}{value:>14.2f}{change:>9.1f}%{marker}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    pages = {game: snapshot_path(game).read_text(encoding="utf-8") for game in Game}
+    expected = json.loads(EXPECTED_PATH.read_text(encoding="utf-8"))
+
+    mismatches = check(pages, expected)
+    for mismatch in mismatches[:20]:
+        print(mismatch)
+
+    results: dict[str, float] = {"mismatches": len(mismatches)}
+    results.update(bench_parse(pages, args.iterations))
+    results.update(asyncio.run(bench_execute(pages)))
+
+    for metric, value in results.items():
+        print(f"{metric:<28}{value:>14.2f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Snapshot corpus of the wiki code pages used by benchmarks.wiki_codes
+
+Usage: python -m benchmarks.wiki_snapshots [--fetch]
+
+`--fetch` saves the live pages in `WIKI_PAGES` and records as expected rows what `pandas.read_html` extracts from them,
+the way the bot read the tables before its own parser, so the parser is checked against an independent implementation
+on real fandom markup. pandas and lxml are only needed here, they are in requirements-dev.txt.
+
+Without `--fetch` the snapshots are generated deterministically instead, following the markup of the fandom pages
+(page chrome and inline config scripts before the table, code cells with a Quick Redeem link and footnotes, item cards
+for rewards, shared server cells, expired, China-only and blocked rows, navboxes after the table). expected.json then
+holds the rows each page is generated from, and the pages are also read with pandas to confirm it agrees with them.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import re
+from pathlib import Path
+
+os.environ.setdefault("ENV", "dev")
+os.environ["MONGODB_BACKEND"] = "mongomock"
+
+from zenox.static.constants import WIKI_PAGES, HOYO_REDEEM_URLS
+from zenox.static.enums import Game
+
+SNAPSHOTS_DIR = Path(__file__).parent / "snapshots" / "wiki"
+EXPECTED_PATH = SNAPSHOTS_DIR / "expected.json"
+
+def snapshot_path(game: Game) -> Path:
+    return SNAPSHOTS_DIR / f"{game.name.lower()}.html"
+
+ROWS = {Game.GENSHIN: 180, Game.STARRAIL: 140, Game.ZZZ: 90}
+REWARDS = {
+    Game.GENSHIN: ["Primogem", "Mora", "Hero's Wit", "Mystic Enhancement Ore", "Adventurer's Experience", "Fine Enhancement Ore", "Sweet Madame", "Fisherman's Toast", "Crystal Core"],
+    Game.STARRAIL: ["Stellar Jade", "Credit", "Traveler's Guide", "Refined Aether", "Lost Gold Fragment", "Adventure Log", "Condensed Aether", "Fuel (Trailblaze)"],
+    Game.ZZZ: ["Polychrome", "Dennies", "Senior Investigator Log", "W-Engine Energy Module", "Official Investigator Log", "Bangboo Algorithm Module", "Ether Plating Agent"]
+}
+SERVERS = ["All"] * 8 + ["America", "Europe", "Asia", "TW/HK/Macao", "America, Europe, Asia, TW/HK/Macao"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+
+def make_rows(game: Game, rng: random.Random) -> list[dict]:
+    rows = []
+    for i in range(ROWS[game]):
+        kind = rng.choices(["active", "expired", "china", "blocked"], [10, 80, 6, 4])[0]
+        size = rng.choices([1, 2, 3], [85, 10, 5])[0]
+        codes = ["".join(rng.choices(CODE_ALPHABET, k=rng.randint(10, 14))) for _ in range(size)]
+        if kind == "blocked":
+            codes = rng.choice([["TWITCH" + codes[0]], ["PRIME"], ["HoYo", "FEST", "2024"], ["DISCORD"]])
+        rewards = []
+        for reward in rng.sample(REWARDS[game], rng.randint(1, 4)):
+            rewards.append({"reward": reward, "amount": rng.choice([1, 2, 3, 5, 10, 30, 50, 60, 100, 10000, 20000, 50000])})
+        rows.append({
+            "codes": codes,
+            "server": "China" if kind == "china" else rng.choice(SERVERS),
+            "rewards": rewards,
+            "expired": kind == "expired",
+            "footnote": rng.random() < 0.15,
+            "discovered": f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, {2020 + i * 5 // ROWS[game]}"
+        })
+    rows.reverse() # Newest first, like the wiki
+    return rows
+
+def render_reward(reward: dict, rng: random.Random) -> str:
+    slug = reward["reward"].replace(" ", "_").replace("'", "%27")
+    icon = f'<span class="card-image-container"><a href="/wiki/{slug}" title="{reward["reward"]}"><img alt="{reward["reward"]}" src="https://static.wikia.nocookie.net/gensin-impact/images/{rng.getrandbits(16):x}/{slug}.png/revision/latest/scale-to-width-down/20" decoding="async" loading="lazy" width="20" height="20" /></a></span>'
+    return f'<span class="item">{icon}<span class="item-text"> <a href="/wiki/{slug}" title="{reward["reward"]}">{reward["reward"]}</a> ×{reward["amount"]:,}</span></span>'
+
+def render_row(game: Game, row: dict, server_span: int | None, rng: random.Random) -> str:
+    codes = "<br />".join(f"<code><b>{code}</b></code>" for code in row["codes"])
+    link = f'<br /><small><a rel="nofollow" class="external text" href="{HOYO_REDEEM_URLS[game]}{row["codes"][0]}">Quick Redeem</a></small>'
+    footnote = f'<sup id="cite_ref-{rng.getrandbits(20)}" class="reference"><a href="#cite_note-{rng.getrandbits(20)}">[Note 1]</a></sup>' if row["footnote"] else ""
+    server = "" if server_span is None else f'<td{f" rowspan={chr(34)}{server_span}{chr(34)}" if server_span > 1 else ""}>{row["server"]}</td>'
+    rewards = "<br />\n".join(render_reward(reward, rng) for reward in row["rewards"])
+    duration = f'Discovered: {row["discovered"]}<br />' + ("Expired: " + row["discovered"] if row["expired"] else 'Valid until: <i>unknown</i><span style="display:none">sort key</span>')
+    return f'<tr>\n<td>{codes}{footnote}{link}\n</td>\n{server}\n<td>{rewards}\n</td>\n<td>{duration}\n</td></tr>\n'
+
+def render_table(game: Game, rows: list[dict], rng: random.Random) -> str:
+    html = '<table class="wikitable sortable tdc2" style="width:100%;">\n<tbody><tr>\n<th>Code</th>\n<th>Server</th>\n<th>Rewards</th>\n<th>Duration</th></tr>\n'
+    i = 0
+    while i < len(rows):
+        span = 1
+        while i + span < len(rows) and span < 3 and rows[i + span]["server"] == rows[i]["server"] and rng.random() < 0.5:
+            span += 1
+        for j in range(span):
+            html += render_row(game, rows[i + j], span if j == 0 else None, rng)
+        i += span
+    return html + "</tbody></table>\n"
+
+def render_page(game: Game, rows: list[dict], rng: random.Random) -> str:
+    title = WIKI_PAGES[game].rsplit("/", 1)[1].replace("_", " ")
+    config = json.dumps({f"wg{rng.getrandbits(32):x}": "".join(rng.choices(CODE_ALPHABET, k=60)) for _ in range(1500)})
+    links = "".join(f'<li><a href="/wiki/Page_{i}" title="Page {i}">Page {i}</a></li>' for i in range(600))
+    navbox = "".join(f'<tr><th class="navbox-group">Group {i}</th><td class="navbox-list">{links[:4000]}</td></tr>' for i in range(6))
+    return (
+        f'<!DOCTYPE html>\n<html class="client-nojs" lang="en" dir="ltr">\n<head>\n<meta charset="UTF-8"/>\n'
+        f'<title>{title} | {game.value} Wiki | Fandom</title>\n'
+        f'<script>var mw_config = {config}; if (document.body && "<table>".length) {{}}</script>\n'
+        f'<link rel="stylesheet" href="https://{game.name.lower()}.fandom.com/load.php?modules=site.styles"/>\n</head>\n'
+        f'<body class="mediawiki skin-fandomdesktop">\n<nav class="global-navigation"><ul>{links}</ul></nav>\n'
+        f'<main class="page__main"><h1 class="page-header__title">{title}</h1>\n<div class="mw-parser-output">\n'
+        f'<p><b>{title}s</b> can be redeemed for free rewards in {game.value}.</p>\n'
+        f'<h2><span class="mw-headline" id="Active_Codes">Codes</span></h2>\n{render_table(game, rows, rng)}'
+        f'<h2><span class="mw-headline" id="Notes">Notes</span></h2>\n<ol class="references"><li>Note 1</li></ol>\n'
+        f'<table class="navbox"><tbody>{navbox}</tbody></table>\n</div></main>\n'
+        f'<footer class="global-footer"><ul>{links}</ul></footer>\n</body>\n</html>\n'
+    )
+
+def reference_records(html: str) -> list[dict]:
+    """The rows of the first table as the bot extracted them with pandas, before `zenox.static.wiki` replaced it"""
+    import pandas as pd
+    records = []
+    for _, row in pd.read_html(io.StringIO(html))[0].iterrows():
+        cells = ["" if pd.isna(cell) else str(cell) for cell in row.iloc[:4]]
+        name = re.sub(r"\[.*", "", cells[0]).replace("Quick Redeem", "").rstrip()
+        rewards = []
+        for reward, amount in re.findall(r"([\w\s\-\'\(\)\"]+) ×(\d+(?:,\d{3})*)", cells[2].replace("\"", "")):
+            reward = {"reward": reward.lstrip(), "amount": int(amount.replace(",", ""))}
+            if reward not in rewards:
+                rewards.append(reward)
+        records.append({"name": name, "codes": name.split(" "), "server": cells[1], "rewards": rewards, "expired": "Expired:" in cells[3]})
+    return records
+
+def expected_records(rows: list[dict]) -> list[dict]:
+    return [
+        {"name": " ".join(row["codes"]), "codes": row["codes"], "server": row["server"], "rewards": row["rewards"], "expired": row["expired"]}
+        for row in rows
+    ]
+
+def generate() -> dict[str, list[dict]]:
+    expected = {}
+    for game in Game:
+        rng = random.Random(f"wiki-{game.name}")
+        rows = make_rows(game, rng)
+        html = render_page(game, rows, rng)
+        snapshot_path(game).write_text(html, encoding="utf-8")
+        expected[game.name] = expected_records(rows)
+        if reference_records(html) != expected[game.name]:
+            raise SystemExit(f"pandas reads the generated {game.name} page differently from the rows it was generated from")
+    return expected
+
+async def fetch() -> dict[str, list[dict]]:
+    import aiohttp
+    expected = {}
+    async with aiohttp.ClientSession() as session:
+        for game in Game:
+            async with session.get(WIKI_PAGES[game]) as response:
+                response.raise_for_status()
+                html = await response.text()
+            snapshot_path(game).write_text(html, encoding="utf-8")
+            expected[game.name] = reference_records(html)
+    return expected
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fetch", action="store_true", help="save the live pages instead of generating them")
+    args = parser.parse_args()
+
+    SNAPSHOTS_DIR.mkdir(parents=True, exist_ok=True)
+    expected = asyncio.run(fetch()) if args.fetch else generate()
+    EXPECTED_PATH.write_text(json.dumps(expected, indent=1, ensure_ascii=False) + "\n", encoding="utf-8")
+    for game in Game:
+        print(f"{snapshot_path(game)}: {snapshot_path(game).stat().st_size / 1024:.0f} KiB, {len(expected[game.name])} rows")
+
+if __name__ == "__main__":
+    main()
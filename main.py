@@ -29,13 +29,13 @@ client = Zenox(env=env, config=config)
 
 @client.event
 async def on_guild_join(guild: discord.Guild):
-    GuildConfig(guild.id)
+    await GuildConfig.fetch(guild.id)
     embed = discord.Embed(title=f"Joined {guild.name} ({guild.id})", description=f"```\nMembers: {guild.member_count}\n```")
     await send_webhook(client.log_webhook_url, username="Guild Join Event", embed=embed)
 
 @client.event
 async def on_guild_remove(guild: discord.Guild):
-    conf = GuildConfig(guild.id)
+    conf = await GuildConfig.fetch(guild.id)
     embed = discord.Embed(title=f"Left {guild.name} ({guild.id})", description=f"```\nMembers: {guild.member_count}\n```")
     await send_webhook(client.log_webhook_url, username="Guild Leave Event", embed=embed)
 
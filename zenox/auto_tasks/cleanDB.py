@@ -39,16 +39,12 @@ class cleanDB:
         self.__reset_vars()
         self._start = time.time()
 
-        guilds: list[int] = []
-        db_guilds: list[int] = []
-        for guild in self._bot.guilds:
-            guilds.append(guild.id)
-        DB_GUILDS = self._bot.db.guilds.find({},{"_id": 0, "id":1})
-        for guild in DB_GUILDS:
+        guilds: set[int] = {guild.id for guild in self._bot.guilds}
+        db_guilds: set[int] = set()
+        async for guild in GuildConfig.iterate({}):
             try:
-                guild = GuildConfig(guild['id'])
                 if guild.id in guilds:
-                    db_guilds.append(guild.id)
+                    db_guilds.add(guild.id)
                     if guild.pending_deletion:
                         guild.updatePendingDeletion(False)
                         self.__incr_val('restored')
@@ -56,7 +52,7 @@ class cleanDB:
                     self.__incr_val('skipped')
                 else:
                     if guild.pending_deletion:
-                        guild.remove_guild()
+                        await guild.remove_guild()
                         self.__incr_val('deleted')
                         continue
                     guild.updatePendingDeletion(True)
@@ -67,6 +63,6 @@ class cleanDB:
         
         for guild in guilds:
             if guild not in db_guilds:
-                GuildConfig(guild)
+                await GuildConfig.fetch(guild)
         self._end = time.time()
         await send_webhook(self._bot.log_webhook_url, username="cleanDB Task", embed=self.__get_embed())
\ No newline at end of file
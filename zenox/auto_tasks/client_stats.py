@@ -1,6 +1,7 @@
 import discord
 from zenox.bot.bot import Zenox
-from zenox.db.mongodb import DB
+from pymongo import UpdateOne
+from zenox.db.mongodb import ASYNC_DB
 from datetime import datetime
 from zenox.static.embeds import Embed
 from zenox.static.utils import send_webhook
@@ -24,16 +25,19 @@ class client_stats:
             member_count = 0
             guild_count = len(client.guilds)
 
+            updates: list[UpdateOne] = []
             for guild in client.guilds:
                 member_count += guild.member_count
-                DB.guilds.update_one({"id": guild.id}, {"$set": {"memberCount": guild.member_count}})
+                updates.append(UpdateOne({"id": guild.id}, {"$set": {"memberCount": guild.member_count}}))
+            if updates:
+                await ASYNC_DB.guilds.bulk_write(updates, ordered=False)
 
-            DB.const.update_one(
+            await ASYNC_DB.const.update_one(
                 {"_id": "guild_growth"},
                 {"$push": {"growth": {"date": datetime.now(), "guilds": guild_count}}},
                 upsert=True
             )
-            DB.const.update_one(
+            await ASYNC_DB.const.update_one(
                 {"_id": "guild_user_growth"},
                 {"$push": {"growth": {"date": datetime.now(), "users": member_count}}},
                 upsert=True
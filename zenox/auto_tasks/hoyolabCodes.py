@@ -1,14 +1,19 @@
+import asyncio
+import aiohttp
 import discord
-import requests
 import time
 from discord.utils import MISSING
 from typing import ClassVar
 from ..bot.bot import Zenox
 from ..static.enums import Game
-from ..static.constants import HOYOLAB_GAME_IDS, GAME_THUMBNAILS
+from ..static.constants import HOYOLAB_GAME_IDS
+from ..static.assets import ASSETS
 from ..db.structures import SpecialProgram, Code, CodeReward
 from zenox.ui.hoyolab_codes.view import HoyolabCodesUI
 from ..l10n import translator
+from ..metrics import HOYOLAB_REQUEST_LATENCY
+
+HOYOLAB_TIMEOUT = aiohttp.ClientTimeout(total=15, connect=5)
 
 class hoyolabCodes:
     """
@@ -27,13 +32,13 @@ class hoyolabCodes:
 
     async def update_message(self):
         for game in Game:
-            special_program = SpecialProgram(game, self._bot.config.auto_stream_codes_config[game].version)
+            special_program = await SpecialProgram.fetch(game, self._bot.config.auto_stream_codes_config[game].version)
             
             _, embed, _ = await special_program.buildMessage(self._bot, locale=discord.Locale("en-US"))
             view = HoyolabCodesUI(author=None, data=special_program, locale=discord.Locale("en-US"))
-            attachments = [discord.File("./zenox-assets/assets/genshin-impact/thumbnails/" + GAME_THUMBNAILS[special_program.game], filename="thumbnail.png")]
+            attachments = [ASSETS.thumbnail(special_program.game)]
 
-            STATE = self._get_state(self, game, self._bot.config.auto_stream_codes_config[game].version)
+            STATE = await self._get_state(self, game, self._bot.config.auto_stream_codes_config[game].version)
             CHANNEL = self._bot.get_channel(self._bot.config.auto_stream_codes_config[game].channel)
             MESSAGE = CHANNEL.get_partial_message(self._bot.config.auto_stream_codes_config[game].message)
             await MESSAGE.edit(content=f"State `{STATE}` `{self._STATES[STATE]}` Version `{self._bot.config.auto_stream_codes_config[game].version}` Next Update <t:{round(time.time()+180)}:R>", embed=embed, attachments=attachments, view=view)
@@ -46,7 +51,6 @@ class hoyolabCodes:
             "path": f"/community/painter/wapi/circle/channel/guide/material?game_id={gameID}",
             "scheme": "https",
             "accept": "application/json, text/plain, */*",
-            "accept-encoding": "gzip, deflate, br",
             "accept-language": "en-DE,en;q=0.9,de-DE;q=0.8,de;q=0.7,en-GB;q=0.6,en-US;q=0.5,zh-CN;q=0.4,zh;q=0.3",
             "origin": "https://www.hoyolab.com",
             "referer": "https://www.hoyolab.com/",
@@ -66,23 +70,29 @@ class hoyolabCodes:
             "x-rpc-source_info": '{"sourceName":"","sourceType":"","sourceId":"","sourceArrangement":"","sourceGameId":""}',
             "x-rpc-sys_version": "Windows NT 10.0",
             "x-rpc-timezone": "Europe/Berlin",
-            "x-rpc-weekday": "5"
+            "x-rpc-weekday": "5",
+            "User-Agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Mobile Safari/537.36"
         }
         return HEADERS
     async def _api_request(self, game: Game):
         print(f"Sent Hoyolab request for {game.value}")
         _url = f"https://bbs-api-os.hoyolab.com/community/painter/wapi/circle/channel/guide/material?game_id={HOYOLAB_GAME_IDS[game]}"
 
-        session = requests.Session()
-        session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/130.0.0.0 Mobile Safari/537.36"
-        })
-        response = session.get(_url, headers=self._get_header(self, HOYOLAB_GAME_IDS[game]))
-        response.raise_for_status()
-        resp_json = response.json()
+        start = time.perf_counter()
+        status = "error"
+        try:
+            async with self._bot.session.get(_url, headers=self._get_header(self, HOYOLAB_GAME_IDS[game]), timeout=HOYOLAB_TIMEOUT) as response:
+                status = str(response.status)
+                response.raise_for_status()
+                resp_json = await response.json(content_type=None)
+        except asyncio.TimeoutError:
+            status = "timeout"
+            raise
+        finally:
+            HOYOLAB_REQUEST_LATENCY.labels(game.value, status).observe(time.perf_counter() - start)
         return resp_json
     
-    def _parse_data(self, response_data, special_program: SpecialProgram):
+    async def _parse_data(self, response_data, special_program: SpecialProgram):
         module_data = None
         # Check if Module 7 exists in data (7 = Stream Codes)
         for i, module in enumerate(response_data['data']['modules']):
@@ -100,7 +110,7 @@ class hoyolabCodes:
         for code_data in module_data['exchange_group']['bonuses']:
             if not code_data['exchange_code']:
                 continue
-            code: Code = Code(game=special_program.game, code=code_data['exchange_code'])
+            code = await Code.fetch(special_program.game, code_data['exchange_code'])
             if code.expire_unix != code_data['offline_at']:
                 code._update_val("expire_unix", code_data['offline_at'])
             if not code.discovered_unix:
@@ -112,16 +122,17 @@ class hoyolabCodes:
             return False
         return True
     
-    def _get_state(self, game: Game, version: str):
+    async def _get_state(self, game: Game, version: str):
         if self._bot.config.auto_stream_codes_config[game].disabled: # Disabled Game
           return 0
         elif self._bot.config.auto_stream_codes_config[game].stream_time == 0: # No Stream scheduled
           return 1
         elif self._bot.config.auto_stream_codes_config[game].stream_time - time.time() > 0: # Stream hasn't started yet
           return 2
-        elif SpecialProgram(game, version).published: # Codes have been distributed already
+        special_program = await SpecialProgram.fetch(game, version)
+        if special_program.published: # Codes have been distributed already
           return 3
-        elif SpecialProgram(game, version).found: # Codes have been found
+        elif special_program.found: # Codes have been found
             return 5
         return 4
 
@@ -129,15 +140,23 @@ class hoyolabCodes:
     async def execute(self, client: Zenox):
         self._bot = client
         
+        searching: list[tuple[Game, SpecialProgram]] = []
         for game in Game:
-            _state = self._get_state(self, game, self._bot.config.auto_stream_codes_config[game].version)
+            _state = await self._get_state(self, game, self._bot.config.auto_stream_codes_config[game].version)
             if _state not in [4, 5]:
               continue
-            special_program = SpecialProgram(game, self._bot.config.auto_stream_codes_config[game].version)
+            special_program = await SpecialProgram.fetch(game, self._bot.config.auto_stream_codes_config[game].version)
 
             if _state == 4: # No need to send request, if we already know the codes
-              response_data = await self._api_request(self, game)
-              res = self._parse_data(self, response_data, special_program)
-              if res:
-                  special_program.mark("found")
+              searching.append((game, special_program))
+
+        # Games are requested concurrently, a failing game doesn't keep the others from being checked
+        responses = await asyncio.gather(*(self._api_request(self, game) for game, _ in searching), return_exceptions=True)
+        for (game, special_program), response_data in zip(searching, responses):
+            if isinstance(response_data, Exception):
+                self._bot.capture_exception(response_data)
+                continue
+            res = await self._parse_data(self, response_data, special_program)
+            if res:
+                special_program.mark("found")
         await self.update_message(self)
\ No newline at end of file
@@ -1,42 +1,85 @@
 import re
 import time, datetime
+import aiohttp
 import discord
 import genshin
 import asyncio
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, NamedTuple
 from ..static.exceptions import WikiCodesHeaderMismatchError, WikiCodesDataMismatchError
-from zenox.db.mongodb import ANALYTICSDB
-from ..static.constants import Game, WIKI_PAGES, ZENOX_LOCALES, HOYO_REDEEM_URLS, GAME_THUMBNAILS
+from zenox.db.mongodb import ASYNC_DB, ASYNC_ANALYTICSDB
+from ..static.constants import Game, WIKI_PAGES, ZENOX_LOCALES, HOYO_REDEEM_URLS
 from ..l10n import LocaleStr
 from ..static.embeds import Embed
+from ..static.render import RENDERS
+from ..static.http_cache import PageCache
+from ..static.wiki import parse_first_table, first_table_markup
 from ..static.utils import get_emoji, send_webhook, redeem_code
 from ..static import emojis
 from ..db.structures import Code, CodeReward, GuildConfig, CodesConfig
+from ..db.subscriptions import SUBSCRIPTIONS, Subscription
+from ..db.queue import CODE_QUEUE, QueueEntry
 from ..bot.bot import Zenox
+from ..bot.broadcast import Broadcast, BroadcastResult
 from ..ui.components import View, Button
 
+# Parsing a wiki page blocks for long enough to delay gateway heartbeats, it runs on its own threads
+PARSER = ThreadPoolExecutor(max_workers=len(WIKI_PAGES), thread_name_prefix="wiki-parser")
+WIKI_TIMEOUT = aiohttp.ClientTimeout(total=30)
+_FOOTNOTE = re.compile(r"\[.*")
+_REWARD = re.compile(r"([\w\s\-\'\(\)\"]+) ×(\d+(?:,\d{3})*)")
+
+class WikiCode(NamedTuple):
+    """One row of a wiki codes table, `codes` are redeemed together"""
+    name: str
+    codes: tuple[str, ...]
+    server: str
+    rewards: list[dict[str, str | int]]
+    expired: bool
+
+WIKI_CACHE: PageCache[list[WikiCode]] = PageCache("wiki_pages")
+
 # Merge execute and check_publish into one function at a later point
 class wikiCodes:
     
-    _queued_codes: dict[Game, list[list[Code]]] = {}
     _limit = 4
     _stop: bool = False
 
-    _blocked = ["HoYo FEST 2024", "Glad Tidings From Afar"]
-    _blocked_lower = ["prime", "crucialgames", "steelseries", "alienware", "intel gaming access", "amd rewards", "giveaway)", "bundle", "twitch", "discord", "hoyofest", "hoyo fest"]
+    _blocked = frozenset({"HoYo FEST 2024", "Glad Tidings From Afar"})
+    _blocked_lower = frozenset({"prime", "crucialgames", "steelseries", "alienware", "intel gaming access", "amd rewards", "giveaway)", "bundle", "twitch", "discord", "hoyofest", "hoyo fest"})
     _row_headers = ["Code", "Server", "Rewards", "Duration"]
-    _servers = ['All', 'America, Europe, Asia, TW/HK/Macao', 'China', 'America', 'Asia', 'Europe', 'TW/HK/Macao']
+    _servers = frozenset({'All', 'America, Europe, Asia, TW/HK/Macao', 'China', 'America', 'Asia', 'Europe', 'TW/HK/Macao'})
+
+    @classmethod
+    def _parse(self, html: str) -> list[WikiCode]:
+        table = parse_first_table(html)
+        if table.header != self._row_headers: # Verify Table Headers
+            raise WikiCodesHeaderMismatchError
+        codes: list[WikiCode] = []
+        for cells in table.rows:
+            if len(cells) != len(self._row_headers):
+                raise WikiCodesDataMismatchError(f"Expected {len(self._row_headers)} cells, got {len(cells)}: {cells}")
+            name = _FOOTNOTE.sub("", cells[0]).replace("Quick Redeem", "").rstrip()
+            rewards: list[dict[str, str | int]] = []
+            seen: set[tuple[str, int]] = set()
+            for reward, amount in _REWARD.findall(cells[2].replace("\"", "")):
+                key = (reward.lstrip(), int(amount.replace(",", "")))
+                if key not in seen:
+                    seen.add(key)
+                    rewards.append({"reward": key[0], "amount": key[1]})
+            codes.append(WikiCode(name, tuple(name.split(" ")), cells[1], rewards, "Expired:" in cells[3]))
+        return codes
 
     @classmethod
-    def __init_vars(self):
-        for game in Game:
-            self._queued_codes[game] = []
+    async def _get_codes(self, client: Zenox, game: Game) -> list[WikiCode]:
+        return await WIKI_CACHE.fetch(client.session, WIKI_PAGES[game], self._parse, extract=first_table_markup, executor=PARSER, timeout=WIKI_TIMEOUT)
 
     @classmethod
-    def _get_codes(self, game: Game) -> pd.DataFrame:
-        tables = pd.read_html(WIKI_PAGES[game])
-        codes_data = tables[0]
-        return codes_data
+    async def _get_all_codes(self, client: Zenox) -> dict[Game, list[WikiCode]]:
+        """Fetch and parse the codes table of every game with a wiki page concurrently"""
+        games = [game for game in Game if WIKI_PAGES[game]]
+        tables = await asyncio.gather(*(self._get_codes(client, game) for game in games))
+        return dict(zip(games, tables))
 
     @classmethod
     async def execute(self, client: Zenox):
@@ -44,50 +87,49 @@ class wikiCodes:
             return
         try:
             _added_to_queue: list[Code] = []
-            if not self._queued_codes:
-                self.__init_vars()
-            for game in Game:
-                if not WIKI_PAGES[game]:
-                    continue
-                codes_data = self._get_codes(game)
-                if len(self._row_headers) != len(codes_data.columns) or any(self._row_headers[i] != x for i, x in enumerate(codes_data)): # Verify Table Headers
-                    raise WikiCodesHeaderMismatchError
-                for code_data in codes_data.iterrows():
-                    code_names = re.sub(r"\[.*", "", code_data[1].iloc[0]).replace("Quick Redeem", "").rstrip()
-                    if any(x.lower() in self._blocked_lower for x in code_names.split(" ")) or code_names in self._blocked:
-                        continue
-                    code_server = code_data[1].iloc[1]
-                    code_rewards = re.findall(r"([\w\s\-\'\(\)\"]+) ×(\d+(?:,\d{3})*)", code_data[1].iloc[2].replace("\"", ""))
-                    code_infos = code_data[1].iloc[3]
-                    if "Expired:" in code_infos:
+            for game, codes_data in (await self._get_all_codes(client)).items():
+                rows: list[WikiCode] = []
+                for row in codes_data:
+                    if row.expired or row.server not in self._servers or row.name in self._blocked:
                         continue
-                    if not all(str(code).isalnum() for code in code_names.split(" ")):
+                    if not self._blocked_lower.isdisjoint(code.lower() for code in row.codes):
                         continue
-                    if code_server not in self._servers:
+                    if not all(code.isalnum() for code in row.codes):
                         continue
-                    codes: list[Code] = []
+                    rows.append(row)
 
-                    # Add Codes to Queue
-                    for code in code_names.split(" "):
-                        code: Code = Code(game=game, code=code)
-                        if not code.discovered_unix:
-                            code._update_val(key="discovered_unix", value=round(time.time()))
-                        if not code.is_china:
-                            code._update_val(key="is_china", value=code_server=="China")
-                        if not code.rewards:
-                            for reward in code_rewards:
-                                code._add_reward(CodeReward(str(reward[0]).lstrip(), int(str(reward[1]).replace(",", ""))))
-                        codes.append(code)
-                    if not (codes[0].published or any(codes[0].code == x[0].code for x in self._queued_codes[game]) or codes[0].is_china or codes[0].redeemed is not None):
+                # Diff against the stored codes in memory and persist every change with one bulk write
+                known = await Code.load_many(game, [code for row in rows for code in row.codes])
+                changes: dict[str, dict[str, Any]] = {}
+                for row in rows:
+                    for code in row.codes:
+                        existing = known.get(code)
+                        fields = changes.setdefault(code, {})
+                        if not existing or not existing.discovered_unix:
+                            fields.setdefault("discovered_unix", round(time.time()))
+                        if not existing or (not existing.is_china and existing.is_china != (row.server == "China")):
+                            fields["is_china"] = row.server == "China"
+                        if (not existing or not existing.rewards) and row.rewards and "rewards" not in fields:
+                            fields["rewards"] = [dict(reward) for reward in row.rewards] # Parsed rows are cached between runs
+                changes = {code: fields for code, fields in changes.items() if fields}
+                known.update(await Code.save_many(game, changes))
+
+                # Add Codes to Queue
+                await CODE_QUEUE.load()
+                candidates: list[list[str]] = []
+                for row in rows:
+                    code = known[row.codes[0]]
+                    if not (code.published or code.is_china or code.redeemed is not None or code.code in CODE_QUEUE.pending[game]):
                         """Make sure code hasn't been published yet or is already in Queue"""
-                        self._queued_codes[game].append((codes))
-                        _added_to_queue.append(codes[0])
+                        candidates.append(list(row.codes))
+                for codes in await CODE_QUEUE.push_many(game, candidates):
+                    _added_to_queue.append(known[codes[0]])
 
             if _added_to_queue:
                 await send_webhook(
                     webhook_url=client.log_webhook_url,
                     username="WikiCodes Task",
-                    content=f"Added {len(_added_to_queue)} Codes to Queue | Codes in Queue per Game: {', '.join([f'{game.value}: {len(self._queued_codes[game])}' for game in Game if self._queued_codes[game]])}",
+                    content=f"Added {len(_added_to_queue)} Codes to Queue | Codes in Queue per Game: {', '.join([f'{game.value}: {CODE_QUEUE.size(game)}' for game in Game if CODE_QUEUE.size(game)])}",
                     embeds=[Embed(
                         locale=discord.Locale.american_english,
                         title="Added Codes",
@@ -125,206 +167,230 @@ class wikiCodes:
         if self._stop:
             return
         
-        if not self._queued_codes:
-            self.__init_vars()
         # Bundles Rewards from all Codes together and initializes publishing
-        # Function runs 2 hours after execute and calls a (new) function that returns the table to check if the code is still in there
-        # If not remove the code before calculating rewards
         # If _codes is not empty initialize publishing
         # Limit of 5 codes per game per task run
-        if not self._queued_codes:
+        await CODE_QUEUE.load()
+        games = [game for game in Game if CODE_QUEUE.size(game)]
+        if not games:
             return
 
-        for game in Game:
-            if not WIKI_PAGES[game]:
-                continue
-            _curr_codes: list = [re.sub(r"\[.*", "", x[1].iloc[0]).replace("Quick Redeem", "").rstrip() for x in self._get_codes(game).iterrows()] # No need for filtering for blocked words, because they can't be present in the queue
-            _rewards: list[CodeReward] = []
-            _codes: list[Code] = []
-            _removed: list[list[list[Code], int, str]] = []
+        # Games are verified concurrently, redemptions are paced by the HoYoLAB limiters in redeem_code
+        await asyncio.gather(*(self._verify(client, game) for game in games))
+        if self._stop:
+            return # Verified entries stay queued and are published once the task runs again
+        # Broadcasts share Discord's global rate limit, one game is published after another
+        for game in games:
+            await self._publish_verified(client, game)
 
-            for i, queued_codes in enumerate(self._queued_codes[game].copy(), start=1):
-                if i > self._limit:
-                    break
-                try:
-                    await asyncio.sleep(5) # Rate limit for redeeming codes
-                    await redeem_code(queued_codes[0].code, game)
-                    queued_codes[0]._update_val("redeemed", True)
-                except genshin.errors.GenshinException as e:
-                    if e.retcode == -100:
-                        await send_webhook(
-                            webhook_url=client.log_webhook_url,
-                            username="WikiCodes Task",
-                            content="Invalid Cookies",
-                            embeds=[Embed(
-                                locale=discord.Locale.american_english,
-                                title="Invalid Cookies",
-                                description=str(e),
-                                color=0xff0000
-                            )]
-                        )
-                        self._stop = True
-                        client.capture_exception(e)
-                        return
-                    elif isinstance(e, (genshin.errors.RedemptionClaimed, genshin.errors.RedemptionInvalid)) or e.retcode in [-2024, -2002, -2017]:
-                        _removed.append((queued_codes, e.retcode, e.msg))
-                    else:
-                        self._stop = True
-                        client.capture_exception(e)
-                        return
-                    index = self._queued_codes[game].index(queued_codes)
-                    self._queued_codes[game].pop(index)
-                    continue
-                except Exception as e:
-                    client.capture_exception(e)
-                    self._stop = True
+    @classmethod
+    async def _verify(self, client: Zenox, game: Game) -> None:
+        """Redeem the oldest queued codes of `game` to verify them, up to `_limit` verified entries"""
+        _removed: list[tuple[QueueEntry, int | None, str]] = []
+
+        # Entries verified by a run that stopped before publishing count towards the limit and are published now
+        for _ in range(self._limit - len(CODE_QUEUE.entries(game, "verified"))):
+            if self._stop:
+                return
+            entry = await CODE_QUEUE.claim(game)
+            if entry is None:
+                break
+            code = await Code.fetch(game, entry.code)
+            if code.redeemed is not None:
+                # Redeemed before, e.g. by a run that died before acknowledging the entry, the account can't redeem it again
+                if code.redeemed:
+                    await CODE_QUEUE.ack(game, entry.code, "verified")
+                else:
+                    _removed.append((entry, code.redeem_retcode, "Cached result"))
+                    await CODE_QUEUE.ack(game, entry.code, "rejected", retcode=code.redeem_retcode)
+                continue
+            try:
+                await redeem_code(entry.code, game)
+                await code.record_redemption(True)
+            except genshin.errors.GenshinException as e:
+                if e.retcode == -100:
+                    await CODE_QUEUE.release(game, entry.code)
                     await send_webhook(
                         webhook_url=client.log_webhook_url,
                         username="WikiCodes Task",
-                        content="Error while redeeming code",
+                        content="Invalid Cookies",
                         embeds=[Embed(
                             locale=discord.Locale.american_english,
-                            title="Error while redeeming code",
+                            title="Invalid Cookies",
                             description=str(e),
                             color=0xff0000
                         )]
                     )
+                    self._stop = True
+                    client.capture_exception(e)
+                    return
+                elif isinstance(e, (genshin.errors.RedemptionClaimed, genshin.errors.RedemptionInvalid)) or e.retcode in [-2024, -2002, -2017]:
+                    await code.record_redemption(False, e.retcode)
+                    _removed.append((entry, e.retcode, e.msg))
+                    await CODE_QUEUE.ack(game, entry.code, "rejected", retcode=e.retcode, message=e.msg)
+                else:
+                    await CODE_QUEUE.release(game, entry.code)
+                    self._stop = True
+                    client.capture_exception(e)
                     return
-                _codes.append(queued_codes[0]) # Only add the first Code from the list as all the codes are tied together
-                for reward in queued_codes[0].rewards:
-                    _exist = False
-                    for code_reward in _rewards:
-                        if code_reward.reward == reward.reward:
-                            _exist = True
-                            code_reward.amount += reward.amount
-                    if not _exist:
-                        _rewards.append(reward)
-            if _removed:
-                for code in _removed:
-                    for _code in code[0]:
-                        _code._update_val("redeemed", False)
-                await send_webhook(
-                    webhook_url=client.log_webhook_url,
-                    username="WikiCodes Task",
-                    content="Removed Codes from Queue",
-                    embeds=[Embed(
-                        locale=discord.Locale.american_english,
-                        title="Removed Codes",
-                        description="\n".join([f"Code: {code[0][0].code} | Retcode: {code[1]} | Message: {code[2]}" for code in _removed]),
-                        color=0xff0000
-                    )]
-                )
-            if not _codes:
                 continue
-            _translations = self._pre_translate(game, _codes, _rewards)
-            await self._publish(client, game, _codes, _translations)
-            try:
-                for code in _codes.copy():
-                    if len(_codes) == 0:
-                        break
-                    if not self._queued_codes[game][0][0].code == code.code:
-                        raise Exception
-                    
-                    for _code in self._queued_codes[game][0]:
-                        _code._update_val("published", True)
-                    code1 = _codes.pop(0)
-                    code2 = self._queued_codes[game].pop(0)
-                    assert code1.code == code2[0].code
             except Exception as e:
                 client.capture_exception(e)
                 self._stop = True
+                await CODE_QUEUE.release(game, entry.code)
                 await send_webhook(
                     webhook_url=client.log_webhook_url,
                     username="WikiCodes Task",
-                    content="Error while removing Code from Queue",
+                    content="Error while redeeming code",
                     embeds=[Embed(
                         locale=discord.Locale.american_english,
-                        title="Error",
+                        title="Error while redeeming code",
                         description=str(e),
                         color=0xff0000
                     )]
                 )
+                return
+            await CODE_QUEUE.ack(game, entry.code, "verified")
+        if _removed:
+            removed = await Code.load_many(game, [code for entry, _, _ in _removed for code in entry.codes[1:]])
+            for _code in removed.values():
+                _code._update_val("redeemed", False)
+            await send_webhook(
+                webhook_url=client.log_webhook_url,
+                username="WikiCodes Task",
+                content="Removed Codes from Queue",
+                embeds=[Embed(
+                    locale=discord.Locale.american_english,
+                    title="Removed Codes",
+                    description="\n".join([f"Code: {entry.code} | Retcode: {retcode} | Message: {msg}" for entry, retcode, msg in _removed]),
+                    color=0xff0000
+                )]
+            )
+
+    @classmethod
+    async def _publish_verified(self, client: Zenox, game: Game) -> None:
+        verified = CODE_QUEUE.entries(game, "verified")
+        if not verified:
+            return
+        known = await Code.load_many(game, [code for entry in verified for code in entry.codes])
+        _codes: list[Code] = [known[entry.code] for entry in verified] # Only the first Code of an entry, all its codes are tied together
+        _rewards: list[CodeReward] = []
+        for code in _codes:
+            for reward in code.rewards:
+                _exist = False
+                for code_reward in _rewards:
+                    if code_reward.reward == reward.reward:
+                        _exist = True
+                        code_reward.amount += reward.amount
+                if not _exist:
+                    _rewards.append(reward)
+        _translations = self._pre_translate(game, _codes, _rewards)
+        await self._publish(client, game, _codes, _translations)
+        try:
+            for entry in verified:
+                for code in entry.codes:
+                    known[code]._update_val("published", True)
+                await CODE_QUEUE.ack(game, entry.code, "published")
+        except Exception as e:
+            client.capture_exception(e)
+            self._stop = True
+            await send_webhook(
+                webhook_url=client.log_webhook_url,
+                username="WikiCodes Task",
+                content="Error while removing Code from Queue",
+                embeds=[Embed(
+                    locale=discord.Locale.american_english,
+                    title="Error",
+                    description=str(e),
+                    color=0xff0000
+                )]
+            )
     
     @classmethod
     def _pre_translate(self, game: Game, codes: list[Code], rewards: list[CodeReward]) -> dict[discord.Locale, dict[str, Embed | str]]:
-        _translations: dict[discord.Locale, dict[str, Embed | str]] = {}
-        for language in ZENOX_LOCALES:
-            
-            MESSAGE_CONTENT = LocaleStr(key="wikicodes.content").translate(language)
-            EMBED_TITLE = LocaleStr(key="wikicodes_embed.title").translate(language)
-            EMBED_FOOTER = LocaleStr(key="wikicodes_embed.footer", game=game.value).translate(language)
-            REWARDS = LocaleStr(key="rewards").translate(language)
-            DIRECT_LINK = LocaleStr(key="direct_link").translate(language)
-            NO_ROLE_WARNING = LocaleStr(key="role_not_found_error").translate(language)
-            
-            DESC = f"\n{emojis.CODES1}{emojis.CODES2}{emojis.CODES3}\n"
+        code_set = tuple(code.code for code in codes)
+        return {
+            language: RENDERS.get(("wiki_codes", game, code_set, language), lambda: self._render(game, codes, rewards, language))
+            for language in ZENOX_LOCALES
+        }
 
-            for code in codes:
-                DESC += f"> {code.code} | **[{DIRECT_LINK}]({HOYO_REDEEM_URLS[game]+code.code})**\n"
-            
-            DESC += f"\n**〓 {REWARDS} 〓**\n"
+    @classmethod
+    def _render(self, game: Game, codes: list[Code], rewards: list[CodeReward], language: discord.Locale) -> dict[str, Embed | str]:
+        MESSAGE_CONTENT = LocaleStr(key="wikicodes.content").translate(language)
+        EMBED_TITLE = LocaleStr(key="wikicodes_embed.title").translate(language)
+        EMBED_FOOTER = LocaleStr(key="wikicodes_embed.footer", game=game.value).translate(language)
+        REWARDS = LocaleStr(key="rewards").translate(language)
+        DIRECT_LINK = LocaleStr(key="direct_link").translate(language)
+        NO_ROLE_WARNING = LocaleStr(key="role_not_found_error").translate(language)
+        
+        DESC = f"\n{emojis.CODES1}{emojis.CODES2}{emojis.CODES3}\n"
 
-            for reward in rewards:
-                DESC += f"{get_emoji(reward.reward)} **{reward.reward} ×{reward.amount}**\n"
+        for code in codes:
+            DESC += f"> {code.code} | **[{DIRECT_LINK}]({HOYO_REDEEM_URLS[game]+code.code})**\n"
+        
+        DESC += f"\n**〓 {REWARDS} 〓**\n"
 
-            embed = Embed(locale=language, title=EMBED_TITLE, description=DESC)
-            embed.set_thumbnail(url="attachment://thumbnail.png")
-            embed.set_footer(text=EMBED_FOOTER)
+        for reward in rewards:
+            DESC += f"{get_emoji(reward.reward)} **{reward.reward} ×{reward.amount}**\n"
 
+        embed = Embed(locale=language, title=EMBED_TITLE, description=DESC)
+        embed.set_thumbnail(url="attachment://thumbnail.png")
+        embed.set_footer(text=EMBED_FOOTER)
 
-            _translations[language] = {"content": MESSAGE_CONTENT, "embed": embed, "norole": NO_ROLE_WARNING}
-        return _translations
+        return {"content": MESSAGE_CONTENT, "embed": embed, "norole": NO_ROLE_WARNING}
 
     @classmethod
     async def _publish(self, client: Zenox, game: Game, _codes: list[Code], _translations: dict[discord.Locale, dict[str, Embed | str]]) -> None:
-        _success, _failed, _forbidden, _no_channel, _no_role = 0, 0, 0, 0, 0
-        GUILDS = [guild["id"] for guild in client.db.guilds.find({})]
+        TOTAL_GUILDS = await ASYNC_DB.guilds.count_documents({})
         view = View(author=None, locale=discord.Locale.american_english)
         for code in _codes:
             view.add_item(Button(label=code.code, url=HOYO_REDEEM_URLS[game]+code.code))
-        for guild in GUILDS:
-            try:
-                guild = GuildConfig(guild)
-                role = None
-                displayWarning = False
+        embeds, thumbnail_files = await client.uploads.thumbnail(game, {language: _translations[language]["embed"] for language in _translations})
 
-                if not guild.codes_config[game].channel:
-                    _no_channel += 1
-                    continue
+        async def send(broadcast: Broadcast[Subscription], guild: Subscription) -> BroadcastResult:
+            role = None
+            displayWarning = False
 
-                if guild.codes_config[game].role_ping:
-                    role = client.get_guild(guild.id).get_role(guild.codes_config[game].role_ping)
-                    if not role:
-                        displayWarning = True
-                        guild.updateGameConfigValue(game, CodesConfig, "role_ping", None)
-                        _no_role += 1
-                
-                content = f'{_translations[guild.language]["content"]} {role.mention if role else ""} {"@everyone" if guild.codes_config[game].everyone_ping else ""} {_translations[guild.language]["norole"] if displayWarning else ""}'
-                ATTACHMENT = [discord.File("./zenox-assets/assets/genshin-impact/thumbnails/" + GAME_THUMBNAILS[game], filename="thumbnail.png")]
+            discord_guild = client.get_guild(guild.guild_id)
+            if discord_guild is None or discord_guild.unavailable: # Not cached (yet), keep its config for the next run
+                return "failed"
+            channel = client.get_channel(guild.channel_id)
+            if channel is None:
+                return "no_channel"
 
-                channel = client.get_channel(guild.codes_config[game].channel)
-                await channel.send(content=content, embed=_translations[guild.language]["embed"], files=ATTACHMENT, view=view)
-                _success += 1
-            except (discord.Forbidden, AttributeError):
-                guild.updateGameConfigValue(game, CodesConfig, "channel", None)
-                _forbidden += 1
-            except Exception as e:
-                client.capture_exception(e)
-                _failed += 1
+            if guild.role_ping:
+                role = discord_guild.get_role(guild.role_ping)
+                if not role:
+                    displayWarning = True
+                    (await GuildConfig.fetch(guild.guild_id)).updateGameConfigValue(game, CodesConfig, "role_ping", None)
+                    broadcast.incr("no_role")
+
+            content = f'{_translations[guild.language]["content"]} {role.mention if role else ""} {"@everyone" if guild.everyone_ping else ""} {_translations[guild.language]["norole"] if displayWarning else ""}'
+
+            await broadcast.send(channel, content=content, embed=embeds[guild.language], files=thumbnail_files(), view=view)
+            return "success"
+
+        async def forbidden(guild: Subscription) -> None:
+            (await GuildConfig.fetch(guild.guild_id)).updateGameConfigValue(game, CodesConfig, "channel", None)
+
+        broadcast: Broadcast[Subscription] = Broadcast(client)
+        results = await broadcast.run(await SUBSCRIPTIONS.code_subscribers(game), send, on_forbidden=forbidden)
+        results["no_channel"] += max(TOTAL_GUILDS - broadcast.processed, 0) # Only subscribed guilds are visited
+        _success, _failed, _forbidden, _no_channel, _no_role = results["success"], results["failed"], results["forbidden"], results["no_channel"], results["no_role"]
         
         await send_webhook(
             webhook_url=client.log_webhook_url,
             username="WikiCodes Task",
-            content=f"Published {_success} Codes, {_failed} Failed, {_forbidden} Forbidden, {_no_channel} No Channel, {_no_role} No Role\nCodes in Queue for {game.value}: {len(self._queued_codes[game])-len(_codes)}",
+            content=f"Published {_success} Codes, {_failed} Failed, {_forbidden} Forbidden, {_no_channel} No Channel, {_no_role} No Role\nCodes in Queue for {game.value}: {CODE_QUEUE.size(game)-len(_codes)}",
             embeds=[Embed(
                 locale=discord.Locale.american_english,
                 title="Published Codes",
-                description=f"Success: {_success}\nFailed: {_failed}\nForbidden: {_forbidden}",
+                description=f"Success: {_success}\nFailed: {_failed}\nForbidden: {_forbidden}\nDuration: {round(broadcast.elapsed, 3)}s",
                 color=0x00ff00
             )]
         )
 
-        ANALYTICSDB.wiki_codes.insert_one({
+        await ASYNC_ANALYTICSDB.wiki_codes.insert_one({
             "type": "send_wiki_codes",
             "game": game.value,
             "time": datetime.datetime.now(),
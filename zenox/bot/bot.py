@@ -9,13 +9,20 @@ from loguru import logger
 from pathlib import Path
 
 from.command_tree import CommandTree
-from ..db.mongodb import DB
+from ..db.mongodb import DB, run_in_executor
 from..static.utils import get_repo_version, get_now
 from ..db.structures import Config
+from ..db.watcher import CacheWatcher
+from ..db.writer import WRITER
+from ..db.indexes import ensure_indexes
+from ..db.subscriptions import SUBSCRIPTIONS
+from ..db.queue import CODE_QUEUE
+from .uploads import AssetUploader
 from ..l10n import Translator, AppCommandTranslator
 
 class Zenox(commands.AutoShardedBot):
     owner_id: int
+    session: ClientSession
 
     def __init__(
         self,
@@ -32,6 +39,9 @@ class Zenox(commands.AutoShardedBot):
         self.config = config
         self.db = DB
         self.log_webhook_url = os.getenv(f"LOGS_WEBHOOK_{env.upper()}")
+        self.watcher = CacheWatcher.from_env()
+        # Channel announcement thumbnails are uploaded to once, broadcasts reference the attachment's URL
+        self.uploads = AssetUploader(self, int(os.getenv(f"ASSET_CHANNEL_{env.upper()}") or 0) or None)
 
         super().__init__(
             command_prefix=commands.when_mentioned,
@@ -48,6 +58,25 @@ class Zenox(commands.AutoShardedBot):
         # Set Translator
         await self.tree.set_translator(AppCommandTranslator())
 
+        # Shared HTTP connection pool for scraping and external APIs
+        self.session = ClientSession()
+
+        # Indexes backing every config lookup
+        await run_in_executor(ensure_indexes)
+
+        # Subscribed guilds per game for publish jobs
+        await SUBSCRIPTIONS.load()
+
+        # Resume the wiki code queue of the previous process
+        await CODE_QUEUE.load()
+
+        # Coalesce config writes
+        WRITER.start()
+
+        # Keep cached configs in sync with other processes
+        if self.watcher:
+            self.watcher.start()
+
         # Load Cogs
         for filepath in Path("zenox/cogs").glob("*.py"):
             cog_name = Path(filepath).stem
@@ -58,6 +87,14 @@ class Zenox(commands.AutoShardedBot):
                 self.capture_exception(e)
         return await super().setup_hook()
     
+    async def close(self) -> None:
+        if self.watcher:
+            self.watcher.stop()
+        await super().close()
+        await WRITER.stop()
+        if hasattr(self, "session"):
+            await self.session.close()
+
     def capture_exception(self, e: Exception) -> None:
         if isinstance(e, discord.NotFound) and e.code == 10062:
             return
@@ -0,0 +1,116 @@
+import asyncio
+import random
+import time
+import aiohttp
+import discord
+from typing import Any, AsyncIterable, Awaitable, Callable, Generic, Iterable, Literal, TypeVar, TYPE_CHECKING
+from ..static.ratelimit import TokenBucket
+
+if TYPE_CHECKING:
+    from .bot import Zenox
+
+T = TypeVar("T")
+BroadcastResult = Literal["success", "failed", "forbidden", "no_channel", "no_role"]
+
+# Discord allows 50 requests per second globally, stay below to leave room for interactions
+GLOBAL_RATE = 40
+DEFAULT_CONCURRENCY = 25
+# Shared by every broadcast in the process, concurrent broadcasts split the rate instead of each taking all of it
+GLOBAL_BUCKET = TokenBucket(GLOBAL_RATE)
+
+class Broadcast(Generic[T]):
+    """Sends a message to many targets concurrently
+
+    `concurrency` workers pull targets from a shared iterator, so thousands of guilds never turn into thousands of tasks.
+    Every request first takes a token from a process-wide bucket below Discord's global rate limit, discord.py's HTTP
+    client then waits on the per-route bucket and handles 429 responses, server errors and connection resets. Sending a
+    message or creating an event isn't idempotent, so with `retries` only failures to connect, which happen before the
+    request is sent, are retried with exponential backoff. Timeouts and HTTP errors are raised to the caller.
+    """
+
+    def __init__(
+        self,
+        client: "Zenox",
+        *,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        bucket: TokenBucket = GLOBAL_BUCKET,
+        retries: int = 0,
+        backoff: float = 1.0
+    ):
+        self.client = client
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.results: dict[BroadcastResult, int] = {"success": 0, "failed": 0, "forbidden": 0, "no_channel": 0, "no_role": 0}
+        self.processed: int = 0
+        self.elapsed: float = 0.0
+        self._bucket = bucket
+
+    def incr(self, result: BroadcastResult) -> None:
+        self.results[result] += 1
+
+    async def request(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Call a discord API coroutine under the rate limiter, retrying failures to connect"""
+        for attempt in range(self.retries + 1):
+            await self._bucket.acquire()
+            try:
+                return await func(*args, **kwargs)
+            except aiohttp.ClientConnectorError:
+                if attempt == self.retries:
+                    raise
+            for file in kwargs.get("files") or []:
+                file.reset()
+            await asyncio.sleep(self.backoff * 2 ** attempt + random.uniform(0, self.backoff))
+
+    async def send(self, channel: discord.abc.Messageable, **kwargs) -> discord.Message:
+        """`channel.send` with rate limiting, files must be backed by in-memory buffers to be resendable"""
+        return await self.request(channel.send, **kwargs)
+
+    async def run(
+        self,
+        targets: Iterable[T] | AsyncIterable[T],
+        handler: Callable[["Broadcast[T]", T], Awaitable[BroadcastResult]],
+        *,
+        on_forbidden: Callable[[T], Awaitable[None]] | None = None
+    ) -> dict[BroadcastResult, int]:
+        """Run `handler` for every target and count its results
+
+        `targets` may be an async iterable (e.g. a database cursor), sending starts while it is still being consumed.
+        `discord.Forbidden` is counted as forbidden and passed to `on_forbidden`, any other exception is reported and
+        counted as failed. Handlers check themselves for guilds and channels that aren't cached.
+        """
+        start = time.perf_counter()
+        done = object()
+        if isinstance(targets, AsyncIterable):
+            iterator = aiter(targets)
+            lock = asyncio.Lock()
+
+            async def next_target() -> T | object:
+                # Async generators can't be advanced by several workers at once
+                async with lock:
+                    return await anext(iterator, done)
+        else:
+            iterator = iter(targets)
+
+            async def next_target() -> T | object:
+                return next(iterator, done)
+
+        async def worker() -> None:
+            while (target := await next_target()) is not done:
+                self.processed += 1
+                try:
+                    self.incr(await handler(self, target))
+                except discord.Forbidden:
+                    self.incr("forbidden")
+                    if on_forbidden:
+                        try:
+                            await on_forbidden(target)
+                        except Exception as e:
+                            self.client.capture_exception(e)
+                except Exception as e:
+                    self.client.capture_exception(e)
+                    self.incr("failed")
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        self.elapsed = time.perf_counter() - start
+        return self.results
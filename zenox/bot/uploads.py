@@ -0,0 +1,65 @@
+import asyncio
+import time
+import discord
+from loguru import logger
+from typing import Callable, TYPE_CHECKING
+from urllib.parse import parse_qs, urlparse
+from ..static.assets import ASSETS
+from ..static.enums import Game
+
+if TYPE_CHECKING:
+    from .bot import Zenox
+
+# Re-upload before Discord's signed attachment URL expires, so a broadcast never references a dead link
+EXPIRY_MARGIN = 6 * 3600
+
+class AssetUploader:
+    """Uploads an asset once to an asset channel and hands out the CDN URL of that attachment
+
+    Broadcasts reference the URL from their embeds instead of attaching the same file to every message. Discord
+    signs attachment URLs with an expiry (`ex`), the asset is uploaded again once that is within `EXPIRY_MARGIN`.
+    Without a configured channel, or if the upload fails, `url` returns None and callers attach the file instead.
+    """
+
+    def __init__(self, client: "Zenox", channel_id: int | None):
+        self.client = client
+        self.channel_id = channel_id
+        self._urls: dict[str, tuple[str, float]] = {}
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _expires(url: str) -> float:
+        expiry = parse_qs(urlparse(url).query).get("ex")
+        return int(expiry[0], 16) if expiry else float("inf")
+
+    async def url(self, path: str, filename: str) -> str | None:
+        if not self.channel_id:
+            return None
+        async with self._lock:
+            cached = self._urls.get(path)
+            if cached and cached[1] - EXPIRY_MARGIN > time.time():
+                return cached[0]
+            try:
+                channel = self.client.get_channel(self.channel_id) or await self.client.fetch_channel(self.channel_id)
+                message = await channel.send(file=ASSETS.file(path, filename))
+            except (discord.HTTPException, AttributeError) as e:
+                logger.warning(f"Uploading {path} to the asset channel failed, attaching it instead: {e!r}")
+                return None
+            url = message.attachments[0].url
+            self._urls[path] = (url, self._expires(url))
+            return url
+
+    async def thumbnail(self, game: Game, embeds: dict[discord.Locale, discord.Embed]) -> tuple[dict[discord.Locale, discord.Embed], Callable[[], list[discord.File]]]:
+        """Point `embeds` at the uploaded game thumbnail
+
+        Returns the embeds to send and a factory for the files of each message, which is empty when the thumbnail
+        is hosted. The given embeds are copied, not modified, as they may be shared renders.
+        """
+        url = await self.url(ASSETS.thumbnail_path(game), "thumbnail.png")
+        if url is None:
+            return embeds, lambda: [ASSETS.thumbnail(game)]
+        hosted = {}
+        for locale, embed in embeds.items():
+            hosted[locale] = embed.copy()
+            hosted[locale].set_thumbnail(url=url)
+        return hosted, lambda: []
@@ -8,18 +8,25 @@ from discord.app_commands import locale_str
 from discord.ext import commands
 import datetime, random, time
 from ..bot.bot import Zenox
-from ..db.mongodb import DB, ANALYTICSDB, HOYOVERSEDB
+from ..bot.broadcast import Broadcast, BroadcastResult
+from ..db.mongodb import ASYNC_DB, ASYNC_ANALYTICSDB, ASYNC_HOYOVERSEDB, run_in_executor
+from ..db.indexes import verify_query_plans
 from ..db.structures import EventReminder, GuildConfig, EventReminderConfig
+from ..db.subscriptions import SUBSCRIPTIONS
 from ..static.constants import ZENOX_LOCALES, HOYO_OFFICIAL_CHANNELS, _supportCache as _cache
 from ..static.enums import Game
 from ..static.embeds import Embed
 from ..static.emojis import YOUTUBE, TWITCH
+from ..static.exceptions import CollectionScanError
+from ..static.assets import ASSETS
 from ..static.utils import send_webhook
 from ..ui.dev import confirmModal
 from ..l10n import LocaleStr
 
 @app_commands.guild_install()
 class Dev(commands.GroupCog, group_name="dev"):
+    _checkpoint_size = 25
+
     def __init__(self, client: Zenox):
         self.client = client
     
@@ -35,21 +42,21 @@ class Dev(commands.GroupCog, group_name="dev"):
     @app_commands.check(is_owner)
     async def stream_analytics(self, interaction: discord.Interaction[Zenox], game: Game, version: str):
         await interaction.response.defer(thinking=True, ephemeral=True)
-        res = ANALYTICSDB.reminders.find_one({
+        res = await ASYNC_ANALYTICSDB.reminders.find_one({
             "game": game.value,
             "version": version
         })
         if res is not None:
             return await interaction.followup.send(f"Stream Analytics for `{game}` version `{version}` already exists", ephemeral=True)
         
-        res = HOYOVERSEDB.event_reminders.find_one({
+        res = await ASYNC_HOYOVERSEDB.event_reminders.find_one({
             "game": game.value,
             "version": version
         })
         if res is None:
             return await interaction.followup.send(f"Stream Analytics for `{game}` version `{version}` does not exist", ephemeral=True)
 
-        events = EventReminder(game=game, version=version)
+        events = await EventReminder.fetch(game=game, version=version)
         stats: dict[str, int] = {
             "interested_count": 0,
             "guild_not_found": 0,
@@ -83,7 +90,7 @@ class Dev(commands.GroupCog, group_name="dev"):
         )
         await interaction.followup.send(embed=embed)
         # Also store in DB
-        ANALYTICSDB.reminders.insert_one({
+        await ASYNC_ANALYTICSDB.reminders.insert_one({
             "type": "event_analytics",
             "game": game.value,
             "version": version,
@@ -121,7 +128,7 @@ class Dev(commands.GroupCog, group_name="dev"):
     async def request(self, interaction: discord.Interaction, guildid: str, locale: Literal["en-US", "de"]):
         if guildid in _cache:
             return await interaction.response.send_message(f"There's a pending approval", ephemeral=True)
-        if self.client.db.guilds.find_one({"id": int(guildid)}) is None:
+        if await ASYNC_DB.guilds.find_one({"id": int(guildid)}, {"_id": 1}) is None:
             return await interaction.response.send_message(f"The bot is not in the guild with ID `{guildid}`", ephemeral=True)
         
         num = random.randint(1000, 9999)
@@ -152,13 +159,29 @@ class Dev(commands.GroupCog, group_name="dev"):
     )
     @app_commands.check(is_owner)
     async def view_config(self, interaction: discord.Interaction[Zenox], guild_id: str, ephemeral: bool = True):
-        raw_config = DB.guilds.find_one({"id": int(guild_id)})
+        raw_config = await ASYNC_DB.guilds.find_one({"id": int(guild_id)})
         if not raw_config:
            return await interaction.response.send_message(f"No Data found for `{guild_id}`", ephemeral=ephemeral) 
         embed = discord.Embed(title=f"Raw Data for `{guild_id}`", description=f"```json\n{raw_config}\n```")
         embed.set_footer(text=f"Description Length: {len(str(raw_config))}")
         return await interaction.response.send_message(embed=embed, ephemeral=ephemeral)
 
+    @app_commands.command(
+            name=locale_str("query_plans"),
+            description=locale_str("Verify that hot queries use an index")
+    )
+    @app_commands.check(is_owner)
+    async def query_plans(self, interaction: discord.Interaction[Zenox]):
+        await interaction.response.defer(ephemeral=True)
+        try:
+            plans = await run_in_executor(verify_query_plans)
+        except CollectionScanError as e:
+            embed = discord.Embed(title="Collection Scan Detected", description=e.message, color=0xff0000)
+            await send_webhook(self.client.log_webhook_url, username="Query Plans", embed=embed)
+            return await interaction.followup.send(embed=embed, ephemeral=True)
+        description = "\n".join(f"`{query}`: {plan}" for query, plan in plans.items())
+        await interaction.followup.send(embed=discord.Embed(title="Query Plans", description=description, color=0x00ff00), ephemeral=True)
+
     @app_commands.command(
         name=locale_str("schedule_stream"),
         description=locale_str("Schedule a Stream and update config")
@@ -172,7 +195,7 @@ class Dev(commands.GroupCog, group_name="dev"):
         interaction.client.config.update_class_config(game, conf)
         interaction.client.config.update_config_file()
 
-        event_data = EventReminder(game=game, version=version)
+        event_data = await EventReminder.fetch(game=game, version=version)
         if event_data.published:
             return await interaction.response.send_message(f"Version {version} has been published already", ephemeral=True)
         
@@ -182,20 +205,22 @@ class Dev(commands.GroupCog, group_name="dev"):
         if state:
             return
         
-        await image.save(f"./zenox-assets/assets/event-reminders/{image.filename}")
+        await image.save(ASSETS.event_image_path(image.filename))
+        ASSETS.invalidate(ASSETS.event_image_path(image.filename))
         event_data._update_val("title", title)
         event_data._update_val("start", datetime.datetime.fromtimestamp(start, pytz.UTC))
         event_data._update_val("end", datetime.datetime.fromtimestamp(end, pytz.UTC))
         event_data._update_val("image", image.filename)
 
-        _success, _forbidden, _failed, _disabled = await self._create_events(interaction.client, event_data)
+        _success, _forbidden, _failed, _disabled, _throughput = await self._create_events(interaction.client, event_data)
 
         event_data._update_val("published", True)
 
-        await interaction.followup.send(f"Successfully scheduled {game} stream for {version} in {_success} guilds. {_forbidden} guilds missing create event permissions. {_failed} guilds failed to create event.", ephemeral=True)
-        await send_webhook(interaction.client.log_webhook_url, content=f"Successfully scheduled {game} stream for {version} in {_success} guilds. {_forbidden} guilds missing create event permissions. {_failed} guilds failed to create event.")
+        message = f"Successfully scheduled {game} stream for {version} in {_success} guilds. {_forbidden} guilds missing create event permissions. {_failed} guilds failed to create event. ({_throughput:.1f} events/s)"
+        await interaction.followup.send(message, ephemeral=True)
+        await send_webhook(interaction.client.log_webhook_url, content=message)
 
-        ANALYTICSDB.reminders.insert_one({
+        await ASYNC_ANALYTICSDB.reminders.insert_one({
             "type": "create_events",
             "game": game.value,
             "version": version,
@@ -203,7 +228,8 @@ class Dev(commands.GroupCog, group_name="dev"):
                 "success": _success,
                 "forbidden": _forbidden,
                 "failed": _failed,
-                "disabled": _disabled
+                "disabled": _disabled,
+                "throughput": _throughput
             }
         })
 
@@ -218,41 +244,59 @@ class Dev(commands.GroupCog, group_name="dev"):
         return _translations
     
     @classmethod
-    async def _create_events(self, client: Zenox, event_data: EventReminder) -> tuple[int, int, int, int]:
-        _success, _forbidden, _failed, _disabled = 0, 0, 0, 0
-        created_events: list[tuple[int, int]] = []
-        GUILDS = [guild["id"] for guild in client.db.guilds.find({})]
-        EVENT_IMAGE = open(f"./zenox-assets/assets/event-reminders/{event_data.image}", "+rb").read()
+    async def _create_events(self, client: Zenox, event_data: EventReminder) -> tuple[int, int, int, int, float]:
+        game = event_data.game
+        EVENT_IMAGE = ASSETS.read(ASSETS.event_image_path(event_data.image))
         _translations = self._pre_translate_schedule_stream(event_data)
-        for guild in GUILDS:
-            try:
-                guild = GuildConfig(guild)
-                
-                if not guild.event_reminders[event_data.game].config["streams"]:
-                    _disabled += 1
-                    continue
-                if not type(EVENT_IMAGE) == bytes or not EVENT_IMAGE:
-                    EVENT_IMAGE = open(f"./zenox-assets/assets/event-reminders/{event_data.image}", "+rb").read()
-                event = await client.get_guild(guild.id).create_scheduled_event(
-                    name=_translations[guild.language]["name"],
-                    description=_translations[guild.language]["description"],
-                    start_time=event_data.start,
-                    end_time=event_data.end,
-                    location=HOYO_OFFICIAL_CHANNELS[event_data.game]["Twitch"],
-                    image=EVENT_IMAGE,
-                    entity_type=discord.EntityType.external,
-                    privacy_level=discord.PrivacyLevel.guild_only
-                )
-                created_events.append((guild.id, event.id))
-                _success += 1
-            except (discord.Forbidden):
-                guild.updateGameConfigValue(event_data.game, EventReminderConfig, "streams", False)
-                _forbidden += 1
-            except Exception as e:
-                client.capture_exception(e)
-                _failed += 1
-        event_data._update_val("events", created_events)
-        return _success, _forbidden, _failed, _disabled
+
+        total = await ASYNC_DB.guilds.count_documents({})
+        guilds = await SUBSCRIPTIONS.stream_subscribers(game)
+        _disabled = total - len(guilds)
+
+        # Resume a previous, interrupted run by skipping guilds that already have the event
+        done = {guild_id for guild_id, _ in event_data.events}
+        pending = [(guild_id, language) for guild_id, language in guilds.items() if guild_id not in done]
+        checkpoint: list[tuple[int, int]] = []
+
+        async def flush() -> None:
+            if not checkpoint:
+                return
+            events = checkpoint.copy()
+            checkpoint.clear()
+            await event_data.addEvents(events)
+
+        async def create(broadcast: Broadcast[tuple[int, discord.Locale]], guild: tuple[int, discord.Locale]) -> BroadcastResult:
+            guild_id, language = guild
+            discord_guild = client.get_guild(guild_id)
+            if discord_guild is None: # Unavailable or not on this shard, keep its config untouched
+                return "failed"
+            event = await broadcast.request(
+                discord_guild.create_scheduled_event,
+                name=_translations[language]["name"],
+                description=_translations[language]["description"],
+                start_time=event_data.start,
+                end_time=event_data.end,
+                location=HOYO_OFFICIAL_CHANNELS[game]["Twitch"],
+                image=EVENT_IMAGE,
+                entity_type=discord.EntityType.external,
+                privacy_level=discord.PrivacyLevel.guild_only
+            )
+            checkpoint.append((guild_id, event.id))
+            if len(checkpoint) >= self._checkpoint_size:
+                await flush()
+            return "success"
+
+        async def forbidden(guild: tuple[int, discord.Locale]) -> None:
+            (await GuildConfig.fetch(guild[0])).updateGameConfigValue(game, EventReminderConfig, "streams", False)
+
+        broadcast: Broadcast[tuple[int, discord.Locale]] = Broadcast(client)
+        try:
+            results = await broadcast.run(pending, create, on_forbidden=forbidden)
+        finally:
+            await flush()
+        _success = results["success"] + len(done)
+        throughput = results["success"] / broadcast.elapsed if broadcast.elapsed else 0.0
+        return _success, results["forbidden"], results["failed"], _disabled, throughput
 
 
 async def setup(client: Zenox):
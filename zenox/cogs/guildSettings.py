@@ -22,7 +22,7 @@ class GuildSettings(commands.Cog):
     async def config_command(self, interaction: discord.Interaction) -> Any:
         await interaction.response.defer(ephemeral=ephemeral(interaction))
 
-        guildConfig = GuildConfig(interaction.guild.id)
+        guildConfig = await GuildConfig.fetch(interaction.guild.id)
         view = GuildSettingsUI(
             author=interaction.user,
             locale=guildConfig.language,
@@ -6,6 +6,7 @@ from discord.ext import commands, tasks
 from zenox.bot.bot import Zenox
 from zenox.metrics import *
 from zenox.db.structures import GuildConfig
+from zenox.db.mongodb import ASYNC_DB
 
 class PrometheusCog(commands.Cog):
     port: int = 8000
@@ -48,12 +49,13 @@ class PrometheusCog(commands.Cog):
         GUILD_MEMBER_GAUGE.set(sum(guild.member_count for guild in self.client.guilds))
         CHANNEL_GAUGE.set(sum(len(guild.text_channels) + len(guild.voice_channels) for guild in self.client.guilds))
 
+        languages = {x["id"]: x["language"] for x in await ASYNC_DB.guilds.find({}, {"_id": 0, "id": 1, "language": 1})}
         for guild in self.client.guilds:
-            db_res = self.client.db.guilds.find_one({"id": guild.id}, {"language": 1})
-            if db_res and db_res["language"] == "en-US":
+            language = languages.get(guild.id)
+            if language is None or language == "en-US":
                 GUILD_LOCALE_GAUGE.labels(guild.preferred_locale).inc()
             else:
-                GUILD_LOCALE_GAUGE.labels(Locale(db_res["language"])).inc()
+                GUILD_LOCALE_GAUGE.labels(Locale(language)).inc()
 
         UPTIME_GAUGE.set(time.time())
 
@@ -21,7 +21,7 @@ class UserSettings(commands.Cog):
     async def settings_command(self, interaction: discord.Interaction) -> Any:
         await interaction.response.defer(ephemeral=ephemeral(interaction))
 
-        settings = UserConfig(interaction.user.id).settings
+        settings = (await UserConfig.fetch(interaction.user.id)).settings
         view = UserSettingsUI(
             author=interaction.user,
             locale=settings.language,
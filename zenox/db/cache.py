@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Generic, Hashable, Iterator, TypeVar
+from ..metrics import CACHE_HITS, CACHE_MISSES, CACHE_EVICTIONS, CACHE_SIZE
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+class TTLCache(Generic[K, V]):
+    """Size bounded LRU cache whose entries expire `ttl` seconds after they were stored
+
+    `get` records hits and misses under the `name` label, membership checks and item access don't,
+    so a lookup is only counted once. Expired entries are dropped lazily when they are looked up.
+    Configs are also built on the database thread pool, so every operation holds the cache's lock.
+    """
+
+    def __init__(self, name: str, *, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _expired(self, key: K) -> bool:
+        if self._data[key][1] > time.monotonic():
+            return False
+        del self._data[key]
+        CACHE_EVICTIONS.labels(self.name, "expired").inc()
+        CACHE_SIZE.labels(self.name).set(len(self._data))
+        return True
+
+    def __contains__(self, key: K) -> bool:
+        with self._lock:
+            return key in self._data and not self._expired(key)
+
+    def __getitem__(self, key: K) -> V:
+        with self._lock:
+            value, _ = self._data[key]
+            self._data.move_to_end(key)
+            return value
+
+    def __setitem__(self, key: K, value: V) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                CACHE_EVICTIONS.labels(self.name, "size").inc()
+            CACHE_SIZE.labels(self.name).set(len(self._data))
+
+    def __delitem__(self, key: K) -> None:
+        with self._lock:
+            del self._data[key]
+            CACHE_SIZE.labels(self.name).set(len(self._data))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def __iter__(self) -> Iterator[K]:
+        with self._lock:
+            return iter(list(self._data))
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            if key in self:
+                CACHE_HITS.labels(self.name).inc()
+                return self[key]
+        CACHE_MISSES.labels(self.name).inc()
+        return None
+
+    def peek(self, key: K) -> V | None:
+        """`get` without recording a hit or miss, for a second look after a lookup was already counted"""
+        with self._lock:
+            return self[key] if key in self else None
+
+    def invalidate(self, key: K) -> None:
+        """Drop `key` if it is cached, the next lookup reloads it from the database"""
+        with self._lock:
+            if key in self._data:
+                del self[key]
+                CACHE_EVICTIONS.labels(self.name, "invalidated").inc()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            CACHE_SIZE.labels(self.name).set(0)
+
+class KeyedLock(Generic[K]):
+    """One lock per key, so concurrent loads of the same object wait for each other while other keys load in parallel"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks: dict[K, tuple[threading.Lock, int]] = {}
+
+    @contextmanager
+    def __call__(self, key: K) -> Iterator[None]:
+        with self._lock:
+            lock, waiters = self._locks.get(key, (None, 0))
+            lock = lock or threading.Lock()
+            self._locks[key] = (lock, waiters + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._lock:
+                lock, waiters = self._locks[key]
+                if waiters == 1:
+                    del self._locks[key]
+                else:
+                    self._locks[key] = (lock, waiters - 1)
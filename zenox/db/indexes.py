@@ -0,0 +1,78 @@
+import sys
+from loguru import logger
+from typing import Any, Callable, Iterator
+from pymongo import ASCENDING, IndexModel, collection
+from pymongo.errors import OperationFailure
+from .mongodb import DB, HOYOVERSEDB
+from ..static.enums import Game
+from ..static.exceptions import CollectionScanError
+
+# Every hot lookup filters on these keys, unique indexes also make concurrent get-or-create upserts safe
+INDEXES: dict[str, tuple[Callable[[], collection.Collection], list[IndexModel]]] = {
+    "guilds": (lambda: DB.guilds, [IndexModel([("id", ASCENDING)], name="id", unique=True)]),
+    "users": (lambda: DB.users, [IndexModel([("id", ASCENDING)], name="id", unique=True)]),
+    "codes": (lambda: HOYOVERSEDB.codes, [IndexModel([("game", ASCENDING), ("code", ASCENDING)], name="game_code", unique=True)]),
+    "event_reminders": (
+        lambda: HOYOVERSEDB.event_reminders, [IndexModel([("game", ASCENDING), ("version", ASCENDING)], name="game_version", unique=True)]
+    ),
+    "special_programs": (
+        lambda: HOYOVERSEDB.special_programs, [IndexModel([("game", ASCENDING), ("version", ASCENDING)], name="game_version", unique=True)]
+    ),
+    "code_queue": (lambda: HOYOVERSEDB.code_queue, [
+        IndexModel([("game", ASCENDING), ("code", ASCENDING)], name="game_code", unique=True),
+        IndexModel([("game", ASCENDING), ("state", ASCENDING), ("queued_unix", ASCENDING)], name="game_state_queued")
+    ])
+}
+
+# (collection, filter) of the queries issued on every config lookup
+HOT_QUERIES: list[tuple[str, dict[str, Any]]] = [
+    ("guilds", {"id": 0}),
+    ("users", {"id": 0}),
+    ("codes", {"game": Game.GENSHIN.value, "code": ""}),
+    ("codes", {"game": Game.GENSHIN.value, "code": {"$in": ["", ""]}}),
+    ("event_reminders", {"game": Game.GENSHIN.value, "version": ""}),
+    ("special_programs", {"game": Game.GENSHIN.value, "version": ""}),
+    ("code_queue", {"game": Game.GENSHIN.value, "state": "discovered"})
+]
+
+def ensure_indexes() -> None:
+    """Create missing indexes, existing ones are left untouched"""
+    for name, (coll, indexes) in INDEXES.items():
+        try:
+            coll().create_indexes(indexes)
+        except OperationFailure:
+            # e.g. duplicate documents preventing a unique index, lookups still work but scan the collection
+            logger.exception(f"Failed to create indexes for {name}")
+
+def _stages(plan: dict[str, Any]) -> Iterator[str]:
+    yield plan.get("stage", "")
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _stages(plan[key])
+    for stage in plan.get("inputStages", []):
+        yield from _stages(stage)
+
+def verify_query_plans() -> dict[str, str]:
+    """Explain every hot query and raise `CollectionScanError` if any of them scans its collection
+
+    Returns the winning plan's stages per query.
+    """
+    plans, scans = {}, []
+    for name, filter in HOT_QUERIES:
+        explained = INDEXES[name][0]().find(filter).limit(1).explain()
+        stages = [stage for stage in _stages(explained["queryPlanner"]["winningPlan"]) if stage]
+        plans[f"{name} {filter}"] = " <- ".join(stages)
+        if "COLLSCAN" in stages:
+            scans.append(f"{name} {filter}")
+    if scans:
+        raise CollectionScanError(scans)
+    return plans
+
+if __name__ == "__main__":
+    ensure_indexes()
+    try:
+        for query, plan in verify_query_plans().items():
+            print(f"{query}: {plan}")
+    except CollectionScanError as e:
+        print(e.message, file=sys.stderr)
+        sys.exit(1)
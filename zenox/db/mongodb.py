@@ -1,19 +1,81 @@
 import sys, os, datetime
-from pymongo import MongoClient, collection
+import asyncio
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, TypeVar
+from pymongo import MongoClient, ReturnDocument, collection, database
+from pymongo.errors import DuplicateKeyError
 from dotenv import load_dotenv
+from .monitoring import CommandMetrics
+
+T = TypeVar("T")
 
 env = os.getenv("ENV")
-print(f"MongoDB Environment is {env}")
-CLUSTER = MongoClient(os.getenv(f'MONGODB_{env.upper()}'))
 
-class MongoDB:
-    _DB = None
+# Optional pool settings, pymongo's defaults apply to those that aren't set
+POOL_OPTIONS = {
+    "maxPoolSize": "MONGODB_MAX_POOL_SIZE",
+    "minPoolSize": "MONGODB_MIN_POOL_SIZE",
+    "maxIdleTimeMS": "MONGODB_MAX_IDLE_TIME_MS",
+    "waitQueueTimeoutMS": "MONGODB_WAIT_QUEUE_TIMEOUT_MS",
+    "connectTimeoutMS": "MONGODB_CONNECT_TIMEOUT_MS",
+    "socketTimeoutMS": "MONGODB_SOCKET_TIMEOUT_MS",
+    "serverSelectionTimeoutMS": "MONGODB_SERVER_SELECTION_TIMEOUT_MS"
+}
+
+def client_options() -> dict[str, Any]:
+    options: dict[str, Any] = {option: int(os.getenv(name)) for option, name in POOL_OPTIONS.items() if os.getenv(name)}
+    options["event_listeners"] = [CommandMetrics(slow_ms=float(os.getenv("MONGODB_SLOW_QUERY_MS", 100)))]
+    return options
+
+_client: MongoClient | None = None
+_client_lock = threading.Lock()
+
+def get_client() -> MongoClient:
+    """The shared client, created on first use so importing this module never connects"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                print(f"MongoDB Environment is {env}")
+                if os.getenv("MONGODB_BACKEND") == "mongomock":
+                    # In-memory stand-in for offline runs and benchmarks, mongomock is in requirements-dev.txt
+                    import mongomock
+                    _client = mongomock.MongoClient()
+                else:
+                    _client = MongoClient(os.getenv(f'MONGODB_{env.upper()}'), **client_options())
+    return _client
+
+def use_client(client: MongoClient) -> None:
+    """Use `client` (e.g. a `mongomock.MongoClient`) for every database instead of connecting to MONGODB_<ENV>"""
+    global _client
+    with _client_lock:
+        _client = client
+
+class LazyDatabase:
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    @property
+    def _DB(self) -> database.Database:
+        return get_client()[self._name]
+
+# pymongo is blocking, all database I/O issued from coroutines runs on this pool instead of the event loop
+EXECUTOR = ThreadPoolExecutor(max_workers=int(os.getenv("MONGODB_EXECUTOR_WORKERS", 16)), thread_name_prefix="mongodb")
+
+async def run_in_executor(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking database call on the database thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(EXECUTOR, partial(func, *args, **kwargs))
 
+class MongoDB(LazyDatabase):
     def __init__(self) -> None:
         if env == "prod":
-            self._DB = CLUSTER["zenox"] # DB Name
+            super().__init__("zenox") # DB Name
         else:
-            self._DB = CLUSTER[f"zenox_{env}"] # DB Name
+            super().__init__(f"zenox_{env}") # DB Name
 
     @property
     def guilds(self) -> collection.Collection:
@@ -29,14 +91,12 @@ class MongoDB:
         # Stores information about bot growth
         return self._DB["const"]
 
-class HoyoverseDB:
-    _DB = None
-
+class HoyoverseDB(LazyDatabase):
     def __init__(self):
         if env == "prod":
-            self._DB = CLUSTER["hoyoverseDB"]
+            super().__init__("hoyoverseDB")
         else:
-            self._DB = CLUSTER[f"hoyoverseDB_{env}"]
+            super().__init__(f"hoyoverseDB_{env}")
     @property
     def event_reminders(self) -> collection.Collection:
         return self._DB["event_reminders"]
@@ -46,15 +106,17 @@ class HoyoverseDB:
     @property
     def codes(self) -> collection.Collection:
         return self._DB["codes"]
+    @property
+    def code_queue(self) -> collection.Collection:
+        # Wiki codes waiting for verification and publication
+        return self._DB["code_queue"]
 
-class AnalyticsDB:
-    _DB = None
-
+class AnalyticsDB(LazyDatabase):
     def __init__(self):
         if env == "prod":
-            self._DB = CLUSTER["analytics"]
+            super().__init__("analytics")
         else:
-            self._DB = CLUSTER[f"analytics_{env}"]
+            super().__init__(f"analytics_{env}")
 
     @property
     def reminders(self) -> collection.Collection:
@@ -70,4 +132,73 @@ class AnalyticsDB:
 
 DB = MongoDB()
 HOYOVERSEDB = HoyoverseDB()
-ANALYTICSDB = AnalyticsDB()
\ No newline at end of file
+ANALYTICSDB = AnalyticsDB()
+
+def get_or_create(coll: collection.Collection, filter: dict[str, Any], defaults: dict[str, Any], projection: dict[str, int] | None = None) -> dict[str, Any]:
+    """Return the document matching `filter`, inserting `defaults` first if there is none, in one round trip"""
+    update = {"$setOnInsert": {key: value for key, value in defaults.items() if key not in filter}}
+    try:
+        return coll.find_one_and_update(filter, update, projection, upsert=True, return_document=ReturnDocument.AFTER)
+    except DuplicateKeyError:
+        # Another process inserted the document between our match and insert, it exists now
+        return coll.find_one(filter, projection)
+
+class AsyncCollection:
+    """Awaitable counterpart of a pymongo collection, every call runs on the database thread pool"""
+
+    def __init__(self, coll: collection.Collection):
+        self.collection = coll
+
+    async def find(self, *args, **kwargs) -> list[dict[str, Any]]:
+        # Cursors fetch lazily, so they are drained inside the worker thread
+        return await run_in_executor(lambda: list(self.collection.find(*args, **kwargs)))
+
+    async def iterate(self, *args, batch_size: int = 500, **kwargs) -> AsyncIterator[dict[str, Any]]:
+        """Stream documents from a single cursor, fetching one batch at a time on the thread pool"""
+        cursor = self.collection.find(*args, batch_size=batch_size, **kwargs)
+        try:
+            while batch := await run_in_executor(lambda: list(itertools.islice(cursor, batch_size))):
+                for document in batch:
+                    yield document
+        finally:
+            await run_in_executor(cursor.close)
+
+    async def find_one(self, *args, **kwargs) -> dict[str, Any] | None:
+        return await run_in_executor(self.collection.find_one, *args, **kwargs)
+
+    async def find_one_and_update(self, *args, **kwargs) -> dict[str, Any] | None:
+        return await run_in_executor(self.collection.find_one_and_update, *args, **kwargs)
+
+    async def count_documents(self, *args, **kwargs) -> int:
+        return await run_in_executor(self.collection.count_documents, *args, **kwargs)
+
+    async def insert_one(self, *args, **kwargs):
+        return await run_in_executor(self.collection.insert_one, *args, **kwargs)
+
+    async def insert_many(self, *args, **kwargs):
+        return await run_in_executor(self.collection.insert_many, *args, **kwargs)
+
+    async def update_one(self, *args, **kwargs):
+        return await run_in_executor(self.collection.update_one, *args, **kwargs)
+
+    async def update_many(self, *args, **kwargs):
+        return await run_in_executor(self.collection.update_many, *args, **kwargs)
+
+    async def delete_one(self, *args, **kwargs):
+        return await run_in_executor(self.collection.delete_one, *args, **kwargs)
+
+    async def bulk_write(self, *args, **kwargs):
+        return await run_in_executor(self.collection.bulk_write, *args, **kwargs)
+
+class AsyncDatabase:
+    """Exposes the collections of a database wrapper (e.g. `DB.guilds`) as `AsyncCollection`s"""
+
+    def __init__(self, database: MongoDB | HoyoverseDB | AnalyticsDB):
+        self._database = database
+
+    def __getattr__(self, name: str) -> AsyncCollection:
+        return AsyncCollection(getattr(self._database, name))
+
+ASYNC_DB = AsyncDatabase(DB)
+ASYNC_HOYOVERSEDB = AsyncDatabase(HOYOVERSEDB)
+ASYNC_ANALYTICSDB = AsyncDatabase(ANALYTICSDB)
@@ -0,0 +1,41 @@
+import threading
+from loguru import logger
+from pymongo import monitoring
+from ..metrics import DB_OPERATION_LATENCY, DB_OPERATION_ERRORS
+
+class CommandMetrics(monitoring.CommandListener):
+    """Records the latency and failures of every MongoDB command per collection and operation
+
+    Commands slower than `slow_ms` milliseconds are logged. Started events are the only ones carrying the command
+    document, so the collection name is remembered until the command finishes.
+    """
+
+    def __init__(self, slow_ms: float = 100):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._collections: dict[tuple, str] = {}
+
+    @staticmethod
+    def _key(event: monitoring.CommandStartedEvent | monitoring.CommandSucceededEvent | monitoring.CommandFailedEvent) -> tuple:
+        return event.connection_id, event.request_id
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        target = event.command.get("collection") if event.command_name == "getMore" else event.command.get(event.command_name)
+        with self._lock:
+            self._collections[self._key(event)] = target if isinstance(target, str) else ""
+
+    def _finished(self, event: monitoring.CommandSucceededEvent | monitoring.CommandFailedEvent) -> tuple[str, float]:
+        with self._lock:
+            collection = self._collections.pop(self._key(event), "")
+        seconds = event.duration_micros / 1_000_000
+        DB_OPERATION_LATENCY.labels(collection, event.command_name).observe(seconds)
+        if seconds * 1000 >= self.slow_ms:
+            logger.warning(f"Slow MongoDB {event.command_name} on {event.database_name}.{collection}: {seconds * 1000:.0f}ms")
+        return collection, seconds
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finished(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        collection, _ = self._finished(event)
+        DB_OPERATION_ERRORS.labels(collection, event.command_name).inc()
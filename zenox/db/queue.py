@@ -0,0 +1,108 @@
+import asyncio
+import time
+from typing import Literal, NamedTuple
+from pymongo import ReturnDocument, UpdateOne
+from .mongodb import ASYNC_HOYOVERSEDB
+from ..static.enums import Game
+
+QueueState = Literal["discovered", "verifying", "verified", "published", "rejected"]
+# States of entries that still have to be published
+PENDING_STATES: tuple[QueueState, ...] = ("discovered", "verifying", "verified")
+# A claim that isn't acknowledged within this time (e.g. the process died mid verification) is handed out again
+CLAIM_LEASE = 15 * 60
+
+class QueueEntry(NamedTuple):
+    code: str
+    codes: tuple[str, ...]
+    state: QueueState
+
+class CodeQueue:
+    """Wiki codes waiting for verification and publication, persisted in the `code_queue` collection
+
+    An entry is a group of codes listed together on the wiki, keyed by its first code, and moves from discovered
+    over verifying (claimed) to verified and published, or to rejected. Pending entries are mirrored in memory per
+    game in queue order, so membership checks don't touch the database. `load` restores them after a restart and
+    hands back claims whose lease ran out unacknowledged, so no verified code is lost or redeemed again.
+    """
+
+    def __init__(self):
+        self.pending: dict[Game, dict[str, QueueEntry]] = {game: {} for game in Game}
+        self._loaded = False
+        self._loading: asyncio.Lock | None = None
+
+    async def load(self) -> None:
+        if self._loaded:
+            return
+        if self._loading is None:
+            self._loading = asyncio.Lock()
+        async with self._loading:
+            if self._loaded:
+                return
+            # Claims still within their lease may belong to another running process
+            await ASYNC_HOYOVERSEDB.code_queue.update_many(
+                {"state": "verifying", "claimed_until": {"$lt": time.time()}},
+                {"$set": {"state": "discovered"}, "$unset": {"claimed_until": ""}}
+            )
+            pending: dict[Game, dict[str, QueueEntry]] = {game: {} for game in Game}
+            for entry in await ASYNC_HOYOVERSEDB.code_queue.find({"state": {"$in": list(PENDING_STATES)}}, sort=[("queued_unix", 1)]):
+                pending[Game(entry["game"])][entry["code"]] = QueueEntry(entry["code"], tuple(entry["codes"]), entry["state"])
+            self.pending = pending
+            self._loaded = True
+
+    def size(self, game: Game) -> int:
+        return len(self.pending[game])
+
+    def entries(self, game: Game, state: QueueState) -> list[QueueEntry]:
+        return [entry for entry in self.pending[game].values() if entry.state == state]
+
+    async def push_many(self, game: Game, groups: list[list[str]]) -> list[list[str]]:
+        """Queue groups of codes in order with one bulk write, returns the groups whose first code wasn't queued before"""
+        await self.load()
+        groups = [codes for codes in groups if codes[0] not in self.pending[game]]
+        if not groups:
+            return []
+        now = time.time()
+        result = await ASYNC_HOYOVERSEDB.code_queue.bulk_write([
+            UpdateOne(
+                {"game": game.value, "code": codes[0]},
+                {"$setOnInsert": {"codes": codes, "state": "discovered", "queued_unix": now + i / 1000}},
+                upsert=True
+            ) for i, codes in enumerate(groups)
+        ], ordered=False)
+        added = [groups[i] for i in sorted(result.upserted_ids)]
+        for codes in added:
+            self.pending[game][codes[0]] = QueueEntry(codes[0], tuple(codes), "discovered")
+        return added
+
+    async def claim(self, game: Game) -> QueueEntry | None:
+        """Atomically take the oldest unclaimed entry of `game` for verification"""
+        await self.load()
+        now = time.time()
+        entry = await ASYNC_HOYOVERSEDB.code_queue.find_one_and_update(
+            {"game": game.value, "$or": [{"state": "discovered"}, {"state": "verifying", "claimed_until": {"$lt": now}}]},
+            {"$set": {"state": "verifying", "claimed_until": now + CLAIM_LEASE}},
+            sort=[("queued_unix", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if entry is None:
+            return None
+        claimed = self.pending[game][entry["code"]] = QueueEntry(entry["code"], tuple(entry["codes"]), "verifying")
+        return claimed
+
+    async def ack(self, game: Game, code: str, state: QueueState, **fields) -> None:
+        """Move an entry to `state`, storing `fields` (e.g. the retcode of a rejection) with it"""
+        await ASYNC_HOYOVERSEDB.code_queue.update_one(
+            {"game": game.value, "code": code},
+            {"$set": {"state": state, "updated_unix": time.time(), **fields}, "$unset": {"claimed_until": ""}}
+        )
+        if state in PENDING_STATES:
+            if code in self.pending[game]:
+                self.pending[game][code] = self.pending[game][code]._replace(state=state)
+        else:
+            self.pending[game].pop(code, None)
+
+    async def release(self, game: Game, code: str) -> None:
+        """Give a claimed entry back unverified, e.g. when verification had to stop"""
+        await self.ack(game, code, "discovered")
+
+CODE_QUEUE = CodeQueue()
@@ -2,19 +2,26 @@ import discord
 import datetime
 import json
 import os
+import sys
 import argparse
 import pytz
 import sentry_sdk
 from dateutil import parser
-from .mongodb import DB, HOYOVERSEDB
+from .mongodb import DB, HOYOVERSEDB, ASYNC_DB, ASYNC_HOYOVERSEDB, run_in_executor, get_or_create
+from .cache import TTLCache, KeyedLock
+from .writer import WRITER
+from .subscriptions import SUBSCRIPTIONS
 from ..static import emojis
-from ..static.constants import DatabaseKey, GAME_THUMBNAILS, HOYO_REDEEM_URLS
+from ..static.constants import DatabaseKey, HOYO_REDEEM_URLS
 from ..l10n import LocaleStr
 from ..static.embeds import Embed
+from ..static.render import RENDERS
+from ..static.assets import ASSETS
 from ..static.enums import Game
 from ..ui.components import View, Button
-from typing import TypeVar, Generic, TypedDict, Any, Literal
+from typing import TypeVar, Generic, Any, AsyncIterator, Iterator, Literal
 from bson.codec_options import CodecOptions
+from pymongo import UpdateOne
 
 class AutoStreamCodesConfig:
     def __init__(self, cfg: dict[str, int | str]):
@@ -61,50 +68,94 @@ class UserSettings:
         self.dyk: bool = settings["dyk"]
 
 class UserConfig:
-    cache = {}
+    cache: TTLCache[int, "UserConfig"] = TTLCache(
+        "users", maxsize=int(os.getenv("USER_CACHE_SIZE", 5000)), ttl=float(os.getenv("USER_CACHE_TTL", 1800))
+    )
+    _loading: KeyedLock[int] = KeyedLock()
 
     @classmethod
     def __get_cache(cls, userID: int):
-        return cls.cache[userID] if userID in cls.cache else None
+        return cls.cache.get(userID)
     def __new__(cls, userID: int):
         existing = cls.__get_cache(userID)
         if existing:
             return existing
-        user = super().__new__(cls)
-        return user
-    def __init__(self, userID: int) -> None:
-        if userID == None:
-            pass
-        if userID in self.cache:
-            return
-        gld = DB.users.find_one({"id": userID})
+        return cls._create(userID)
 
-        if not gld: # User doesn't exist yet
-            self.addUser(userID=userID)
-            gld = DB.users.find_one({"id": userID})
-        
+    @classmethod
+    def _create(cls, userID: int) -> "UserConfig":
+        """Load the user and only then cache it, concurrent loads of one user wait for the first instead of seeing it half built"""
+        with cls._loading(userID):
+            existing = cls.cache.peek(userID)
+            if existing:
+                return existing
+            user = super().__new__(cls)
+            user._load(get_or_create(DB.users, {"id": userID}, cls._document(userID)))
+            return user
+
+    def _load(self, gld: dict[str, Any]) -> None:
+        gld = WRITER.overlay(DB.users, {"id": gld["id"]}, gld)
         self.id: int = gld["id"]
         self.features: list = gld["features"]
         self.flags: list = gld["flags"]
         self.settings: UserSettings = UserSettings(gld["settings"])
 
+        self.cache[self.id] = self
+
     @classmethod
-    def addUser(self, userID: int) -> None:
+    async def fetch(cls, userID: int) -> "UserConfig":
+        """Async constructor, loads the user on the database thread pool if it isn't cached"""
+        existing = cls.__get_cache(userID)
+        if existing:
+            return existing
+        return await run_in_executor(cls._create, userID)
+
+    @classmethod
+    def invalidate(cls, userID: int) -> None:
+        """Drop the cached user, the next lookup reloads it from the database"""
+        cls.cache.invalidate(userID)
+
+    @classmethod
+    def _refresh(cls, gld: dict[str, Any]) -> None:
+        if gld["id"] in cls.cache:
+            cls.cache[gld["id"]]._load(gld)
+
+    @classmethod
+    def _cached_filter(cls) -> dict[str, Any] | None:
+        return {"id": {"$in": list(cls.cache)}} if len(cls.cache) else None
+
+    @staticmethod
+    def _key(gld: dict[str, Any]) -> int:
+        return gld["id"]
+
+    @classmethod
+    def _cached_keys(cls) -> list[int]:
+        return list(cls.cache)
+
+    @classmethod
+    def _evict(cls, userID: int) -> None:
+        """Drop a user whose document was deleted outside of this process"""
+        cls.cache.invalidate(userID)
+
+    @staticmethod
+    def _document(userID: int) -> dict[str, Any]:
         features = [] # List of features the user has access to (Used for private testing)
-        DB.users.insert_one(
-            {
-                "id": userID,
-                "features": features,
-                "flags": [],
-                "settings": {
-                    "language": "en-US",
-                    "dark_mode": True,
-                    "dyk": True
-                }
+        return {
+            "id": userID,
+            "features": features,
+            "flags": [],
+            "settings": {
+                "language": "en-US",
+                "dark_mode": True,
+                "dyk": True
             }
-        )
+        }
+
+    @classmethod
+    def addUser(self, userID: int) -> None:
+        DB.users.insert_one(self._document(userID))
     def _update_val(self, key: str, value: any, operator: str = "$set") -> None:
-        DB.users.update_one({"id": self.id}, {operator: {key: value}})
+        WRITER.update(DB.users, {"id": self.id}, operator, key, value)
 
     def updateSetting(self, setting: str, val: any) -> None:
         self.settings.__setattr__(setting, val)
@@ -117,6 +168,8 @@ class UserConfig:
         self._update_val("settings.dyk", settings.dyk)
 
 class CodesConfig:
+    __slots__ = ("channel", "everyone_ping", "role_ping", "stream_codes", "all_codes")
+
     def __init__(self, config: dict[str, int | bool | None]):
         self.channel = config["channel"]
         self.everyone_ping = config["everyone_ping"]
@@ -124,137 +177,226 @@ class CodesConfig:
         self.stream_codes = config["stream_codes"]
         self.all_codes = config["all_codes"]
 
-class EventReminderDict(TypedDict):
-    streams: bool
-
 class EventReminderConfig:
+    __slots__ = ("streams",)
+
     def __init__(self, config: dict[str, bool]):
-        configDict = {}
-        for key, item in config.items():
-            configDict[key] = item
-        self.config: EventReminderDict = configDict
+        self.streams: bool = config["streams"]
 
 class partnerData:
+    __slots__ = ("inviteUrl", "guildName", "guildMemberCount", "guildDescription")
+
     def __init__(self, data: dict[str, str | None]):
         self.inviteUrl = data["inviteUrl"]
         self.guildName = data["guildName"]
         self.guildMemberCount = data["guildMemberCount"]
         self.guildDescription = data["guildDescription"]
 
+T = TypeVar("T")
+
+class PerGame(Generic[T]):
+    """Slotted stand-in for `dict[Game, T]`, a fraction of the size for objects held per cached guild"""
+    __slots__ = tuple(game.name for game in Game)
+
+    def __init__(self, values: dict[Game, T]):
+        for game, value in values.items():
+            setattr(self, game.name, value)
+
+    def __getitem__(self, game: Game) -> T:
+        return getattr(self, game.name)
+
+    def __iter__(self) -> Iterator[Game]:
+        return iter(Game)
+
+    def items(self) -> Iterator[tuple[Game, T]]:
+        return ((game, self[game]) for game in Game)
+
+def _intern_all(values: list[str] | None) -> tuple[str, ...]:
+    """Feature and flag names repeat across guilds, share one string per name and one empty tuple"""
+    return tuple(sys.intern(value) for value in values) if values else ()
+
 class GuildConfig:
-    cache = {}
+    # Tens of thousands of guilds are cached, slots keep each one small
+    __slots__ = (
+        "id", "memberCount", "features", "flags", "language", "executed_help", "pending_deletion",
+        "codes_config", "event_reminders", "partnerData"
+    )
+    cache: TTLCache[int, "GuildConfig"] = TTLCache(
+        "guilds", maxsize=int(os.getenv("GUILD_CACHE_SIZE", 10000)), ttl=float(os.getenv("GUILD_CACHE_TTL", 3600))
+    )
+    _loading: KeyedLock[int] = KeyedLock()
+    # Fields read by _load, bulk loads skip everything else (e.g. _id)
+    _PROJECTION: dict[str, int] = {
+        "_id": 0, "id": 1, "memberCount": 1, "features": 1, "flags": 1, "language": 1, "executed_help": 1,
+        "pending_deletion": 1, "partnerData": 1, **{DatabaseKey[game]: 1 for game in Game}
+    }
 
     @classmethod
     def __get_cache(cls, guildID: int):
-        return cls.cache[guildID] if guildID in cls.cache else None
+        return cls.cache.get(guildID)
     def __new__(cls, guildID: int):
         existing = cls.__get_cache(guildID)
         if existing:
             return existing
-        guild = super().__new__(cls)
-        return guild
-    def __init__(self, guildID: int) -> None:
-        if guildID == None:
-            pass
-        if guildID in self.cache:
-            return
-        gld = DB.guilds.find_one({"id": guildID})
+        return cls._create(guildID)
 
-        if not gld: # Guild doesn't exist yet
-            self.addGuild(guildID=guildID)
-            gld = DB.guilds.find_one({"id": guildID})
-        
+    @classmethod
+    def _create(cls, guildID: int) -> "GuildConfig":
+        with cls._loading(guildID):
+            existing = cls.cache.peek(guildID)
+            if existing:
+                return existing
+            guild = super().__new__(cls)
+            guild._load(get_or_create(DB.guilds, {"id": guildID}, cls._document(guildID), cls._PROJECTION))
+            return guild
+
+    def _load(self, gld: dict[str, Any]) -> None:
+        gld = WRITER.overlay(DB.guilds, {"id": gld["id"]}, gld)
         self.id: int = gld["id"]
         self.memberCount: int | None = gld["memberCount"]
-        self.features: list = gld["features"]
-        self.flags: list = gld["flags"]
+        self.features: tuple[str, ...] = _intern_all(gld["features"])
+        self.flags: tuple[str, ...] = _intern_all(gld["flags"])
         self.language: discord.Locale = discord.Locale(gld["language"])
         self.executed_help: bool = gld["executed_help"]
         self.pending_deletion: bool = gld["pending_deletion"]
-        self.codes_config: dict[Game, CodesConfig] = {
+        self.codes_config: PerGame[CodesConfig] = PerGame({
             Game.GENSHIN: CodesConfig(gld[DatabaseKey[Game.GENSHIN]]["codes_config"]),
             Game.STARRAIL: CodesConfig(gld[DatabaseKey[Game.STARRAIL]]["codes_config"]),
             Game.ZZZ: CodesConfig(gld[DatabaseKey[Game.ZZZ]]["codes_config"])
-        }
-        self.event_reminders: dict[Game, EventReminderConfig] = {
+        })
+        self.event_reminders: PerGame[EventReminderConfig] = PerGame({
             Game.GENSHIN: EventReminderConfig(gld[DatabaseKey[Game.GENSHIN]]["event_reminders"]),
             Game.STARRAIL: EventReminderConfig(gld[DatabaseKey[Game.STARRAIL]]["event_reminders"]),
             Game.ZZZ: EventReminderConfig(gld[DatabaseKey[Game.ZZZ]]["event_reminders"])
-        }
+        })
         self.partnerData: partnerData = partnerData(gld["partnerData"])
 
         self.cache[self.id] = self
+        SUBSCRIPTIONS.update(self)
 
-        
     @classmethod
-    def addGuild(self, guildID: int) -> None:
+    async def fetch(cls, guildID: int) -> "GuildConfig":
+        existing = cls.__get_cache(guildID)
+        if existing:
+            return existing
+        return await run_in_executor(cls._create, guildID)
+
+    @classmethod
+    def invalidate(cls, guildID: int) -> None:
+        cls.cache.invalidate(guildID)
+
+    @classmethod
+    def _refresh(cls, gld: dict[str, Any]) -> None:
+        if gld["id"] in cls.cache:
+            cls.cache[gld["id"]]._load(gld)
+        else:
+            SUBSCRIPTIONS.update_document(gld)
+
+    @classmethod
+    def _cached_filter(cls) -> dict[str, Any] | None:
+        return {"id": {"$in": list(cls.cache)}} if len(cls.cache) else None
+
+    @staticmethod
+    def _key(gld: dict[str, Any]) -> int:
+        return gld["id"]
+
+    @classmethod
+    def _cached_keys(cls) -> list[int]:
+        return list(cls.cache)
+
+    @classmethod
+    def _evict(cls, guildID: int) -> None:
+        cls.cache.invalidate(guildID)
+        SUBSCRIPTIONS.remove(guildID)
+
+    @classmethod
+    def _from_document(cls, gld: dict[str, Any]) -> "GuildConfig":
+        if gld["id"] in cls.cache:
+            return cls.cache[gld["id"]]
+        guild = super().__new__(cls)
+        guild._load(gld)
+        return guild
+
+    @classmethod
+    async def iterate(cls, query: dict[str, Any]) -> AsyncIterator["GuildConfig"]:
+        """Stream every guild matching `query` from a single projected cursor, already cached guilds are kept as they are"""
+        async for gld in ASYNC_DB.guilds.iterate(query, cls._PROJECTION):
+            yield cls._from_document(gld)
+
+    @staticmethod
+    def _document(guildID: int) -> dict[str, Any]:
         features = [] # List of features the Guild has access to (Used for private testing)
-        with sentry_sdk.start_transaction(name="Creating Guild Entry"):
-            DB.guilds.insert_one(
-                {
-                    "id": guildID,
-                    "memberCount": None,
-                    "features": features,
-                    "flags": [],
-                    "language": "en-US",
-                    "executed_help": False,
-                    "pending_deletion": False,
-                    DatabaseKey[Game.GENSHIN]: {
-                        "codes_config": {
-                            "channel": None,
-                            "everyone_ping": False,
-                            "role_ping": None,
-                            "stream_codes": True,
-                            "all_codes": True
-                        },
-                        "event_reminders": {
-                            "streams": False
-                        }
-                    },
-                    DatabaseKey[Game.STARRAIL]: {
-                        "codes_config": {
-                            "channel": None,
-                            "everyone_ping": False,
-                            "role_ping": None,
-                            "stream_codes": True,
-                            "all_codes": True
-                        },
-                        "event_reminders": {
-                            "streams": False
-                        }
-                    },
-                    DatabaseKey[Game.ZZZ]: {
-                        "codes_config": {
-                            "channel": None,
-                            "everyone_ping": False,
-                            "role_ping": None,
-                            "stream_codes": True,
-                            "all_codes": True
-                        },
-                        "event_reminders": {
-                            "streams": False
-                        }
-                    },
-                    "partnerData": {
-                        "inviteUrl": None,
-                        "guildName": None,
-                        "guildMemberCount": None,
-                        "guildDescription": None
-                    }
+        return {
+            "id": guildID,
+            "memberCount": None,
+            "features": features,
+            "flags": [],
+            "language": "en-US",
+            "executed_help": False,
+            "pending_deletion": False,
+            DatabaseKey[Game.GENSHIN]: {
+                "codes_config": {
+                    "channel": None,
+                    "everyone_ping": False,
+                    "role_ping": None,
+                    "stream_codes": True,
+                    "all_codes": True
+                },
+                "event_reminders": {
+                    "streams": False
+                }
+            },
+            DatabaseKey[Game.STARRAIL]: {
+                "codes_config": {
+                    "channel": None,
+                    "everyone_ping": False,
+                    "role_ping": None,
+                    "stream_codes": True,
+                    "all_codes": True
+                },
+                "event_reminders": {
+                    "streams": False
                 }
-            )
+            },
+            DatabaseKey[Game.ZZZ]: {
+                "codes_config": {
+                    "channel": None,
+                    "everyone_ping": False,
+                    "role_ping": None,
+                    "stream_codes": True,
+                    "all_codes": True
+                },
+                "event_reminders": {
+                    "streams": False
+                }
+            },
+            "partnerData": {
+                "inviteUrl": None,
+                "guildName": None,
+                "guildMemberCount": None,
+                "guildDescription": None
+            }
+        }
+
+    @classmethod
+    def addGuild(self, guildID: int) -> None:
+        with sentry_sdk.start_transaction(name="Creating Guild Entry"):
+            DB.guilds.insert_one(self._document(guildID))
 
-    def remove_guild(self) -> None:
+    async def remove_guild(self) -> None:
         """Remove a Guild"""
-        DB.guilds.delete_one({"id": self.id})
-        del self.cache[self.id]
+        WRITER.discard(DB.guilds, {"id": self.id})
+        await ASYNC_DB.guilds.delete_one({"id": self.id})
+        self.invalidate(self.id)
+        SUBSCRIPTIONS.remove(self.id)
     
     def _update_val(self, key: str, value: any, operator: str = "$set") -> None:
-        DB.guilds.update_one({"id": self.id}, {operator: {key: value}})
+        WRITER.update(DB.guilds, {"id": self.id}, operator, key, value)
     
     def updateLanguage(self, language: discord.Locale) -> None:
         self.language = language
         self._update_val("language", language.value)
+        SUBSCRIPTIONS.update(self)
     
     def updatePendingDeletion(self, state: bool):
         self.pending_deletion = state
@@ -265,10 +407,11 @@ class GuildConfig:
             self.codes_config[game].__setattr__(key, value)
             self._update_val(f"{DatabaseKey[game.value]}.codes_config.{key}", value)
         elif dataType == EventReminderConfig:
-            self.event_reminders[game].config[key] = value
+            self.event_reminders[game].__setattr__(key, value)
             self._update_val(f"{DatabaseKey[game.value]}.event_reminders.{key}", value)
         else:
             raise ValueError
+        SUBSCRIPTIONS.update(self)
     
     def updatePartnerData(self, key: str, value: str | None):
         self.partnerData.__setattr__(key, value)
@@ -281,6 +424,7 @@ class CodeReward:
 
 class Code:
     cache = {Game.GENSHIN: {}, Game.STARRAIL: {}, Game.ZZZ: {}}
+    _loading: KeyedLock[tuple[Game, str]] = KeyedLock()
 
     @classmethod
     def __get_cache(cls, game: Game, code: str):
@@ -289,15 +433,20 @@ class Code:
         existing = cls.__get_cache(game, code)
         if existing:
             return existing
-        code = super().__new__(cls)
-        return code
-    def __init__(self, game: Game, code: str):
-        if code in self.cache[game]:
-            return
-        gld = HOYOVERSEDB.codes.find_one({"game": game.value, "code": code})
-        if not gld:
-            self.addCode(game, code)
-            gld = HOYOVERSEDB.codes.find_one({"game": game.value, "code": code})
+        return cls._create(game, code)
+
+    @classmethod
+    def _create(cls, game: Game, code: str) -> "Code":
+        with cls._loading((game, code)):
+            existing = cls.__get_cache(game, code)
+            if existing:
+                return existing
+            obj = super().__new__(cls)
+            obj._load(get_or_create(HOYOVERSEDB.codes, {"game": game.value, "code": code}, cls._document(game, code)))
+            return obj
+
+    def _load(self, gld: dict[str, Any]) -> None:
+        gld = WRITER.overlay(HOYOVERSEDB.codes, {"game": gld["game"], "code": gld["code"]}, gld)
         self.game: Game = Game(gld["game"])
         self.code: str = gld["code"]
         self.is_china: bool | None = gld['is_china']
@@ -306,21 +455,100 @@ class Code:
         self.expire_unix: int | None = gld["expire_unix"]
         self.published: bool = gld["published"]
         self.redeemed = gld["redeemed"] 
+        self.redeem_retcode: int | None = gld.get("redeem_retcode")
 
-        self.cache[game][code] = self
+        self.cache[self.game][self.code] = self
+
+    @classmethod
+    async def fetch(cls, game: Game, code: str) -> "Code":
+        existing = cls.__get_cache(game, code)
+        if existing:
+            return existing
+        return await run_in_executor(cls._create, game, code)
+
+    @classmethod
+    def _refresh(cls, gld: dict[str, Any]) -> None:
+        cached = cls.cache[Game(gld["game"])].get(gld["code"])
+        if cached:
+            cached._load(gld)
+
+    @classmethod
+    def _cached_filter(cls) -> dict[str, Any] | None:
+        games = [{"game": game.value, "code": {"$in": list(codes)}} for game, codes in cls.cache.items() if codes]
+        return {"$or": games} if games else None
+
+    @staticmethod
+    def _key(gld: dict[str, Any]) -> tuple[Game, str]:
+        return Game(gld["game"]), gld["code"]
+
+    @classmethod
+    def _cached_keys(cls) -> list[tuple[Game, str]]:
+        return [(game, code) for game, codes in cls.cache.items() for code in list(codes)]
+
+    @classmethod
+    def _evict(cls, key: tuple[Game, str]) -> None:
+        cls.cache[key[0]].pop(key[1], None)
 
     def _update_val(self, key: str, value: any, operator: str = "$set"):
-        HOYOVERSEDB.codes.update_one({"game": self.game.value, "code": self.code}, {operator: {key: value}})
+        WRITER.update(HOYOVERSEDB.codes, {"game": self.game.value, "code": self.code}, operator, key, value)
         self.__setattr__(key, value)
 
+    async def record_redemption(self, redeemed: bool, retcode: int | None = None) -> None:
+        """Store the result of redeeming the code right away instead of through the writer, it must never be redeemed twice"""
+        self.redeemed = redeemed
+        self.redeem_retcode = retcode
+        await ASYNC_HOYOVERSEDB.codes.update_one({"game": self.game.value, "code": self.code}, {"$set": {"redeemed": redeemed, "redeem_retcode": retcode}})
+
     def _add_reward(self, reward: CodeReward):
         self.rewards.append(reward)
-        HOYOVERSEDB.codes.update_one({"game": self.game.value, "code": self.code}, {"$addToSet": {"rewards": {"reward": reward.reward, "amount": reward.amount}}})
+        WRITER.update(HOYOVERSEDB.codes, {"game": self.game.value, "code": self.code}, "$addToSet", "rewards", {"reward": reward.reward, "amount": reward.amount})
         # HOYOVERSEDB.codes.update_one({"game": self.game.value, "code": self.code}, {"$push": {"rewards": [{"reward": reward.reward, "amount": reward.amount}]}})
 
     @classmethod
-    def addCode(self, game: Game, code: str):
-        HOYOVERSEDB.codes.insert_one({
+    def _from_document(cls, gld: dict[str, Any]) -> "Code":
+        cached = cls.cache[Game(gld["game"])].get(gld["code"])
+        if cached:
+            return cached
+        code = super().__new__(cls)
+        code._load(gld)
+        return code
+
+    @classmethod
+    async def load_many(cls, game: Game, codes: list[str]) -> dict[str, "Code"]:
+        """Load many codes with one query, codes that aren't stored yet are missing from the result"""
+        loaded = {code: cls.cache[game][code] for code in codes if code in cls.cache[game]}
+        missing = [code for code in codes if code not in loaded]
+        if missing:
+            for gld in await ASYNC_HOYOVERSEDB.codes.find({"game": game.value, "code": {"$in": missing}}):
+                loaded[gld["code"]] = cls._from_document(gld)
+        return loaded
+
+    @classmethod
+    async def save_many(cls, game: Game, changes: dict[str, dict[str, Any]]) -> dict[str, "Code"]:
+        """Write field changes of many codes with one bulk_write, codes that don't exist yet are created"""
+        operations = []
+        for code, fields in changes.items():
+            defaults = {key: value for key, value in cls._document(game, code).items() if key not in fields and key not in ("game", "code")}
+            operations.append(UpdateOne({"game": game.value, "code": code}, {"$set": fields, "$setOnInsert": defaults}, upsert=True))
+        if operations:
+            await ASYNC_HOYOVERSEDB.codes.bulk_write(operations, ordered=False)
+
+        saved = {}
+        for code, fields in changes.items():
+            cached = cls.cache[game].get(code)
+            if cached:
+                for key, value in fields.items():
+                    if key == "rewards":
+                        value = [CodeReward(x["reward"], x["amount"]) for x in value]
+                    cached.__setattr__(key, value)
+                saved[code] = cached
+            else:
+                saved[code] = cls._from_document({**cls._document(game, code), **fields})
+        return saved
+
+    @staticmethod
+    def _document(game: Game, code: str) -> dict[str, Any]:
+        return {
             "game": game.value,
             "code": code,
             "is_china": None,
@@ -328,12 +556,18 @@ class Code:
             "discovered_unix": None,
             "expire_unix": None,
             "published": False,
-            "redeemed": None
-        })
+            "redeemed": None,
+            "redeem_retcode": None
+        }
+
+    @classmethod
+    def addCode(self, game: Game, code: str):
+        HOYOVERSEDB.codes.insert_one(self._document(game, code))
         
 
 class EventReminder:
     cache = {Game.GENSHIN: {}, Game.STARRAIL: {}, Game.ZZZ: {}}
+    _loading: KeyedLock[tuple[Game, str]] = KeyedLock()
 
     @classmethod
     def __get_cache(cls, game: Game, version: str):
@@ -343,17 +577,20 @@ class EventReminder:
         existing = cls.__get_cache(game, version)
         if existing:
             return existing
-        obj = super().__new__(cls)
-        return obj
-    
-    def __init__(self, game: Game, version: str):
-        if version in self.cache[game]:
-            return
-        gld = HOYOVERSEDB.event_reminders.find_one({"game": game.value, "version": version})
-        if not gld:
-            self.addEventReminder(game, version)
-            gld = HOYOVERSEDB.event_reminders.find_one({"game": game.value, "version": version})
+        return cls._create(game, version)
 
+    @classmethod
+    def _create(cls, game: Game, version: str) -> "EventReminder":
+        with cls._loading((game, version)):
+            existing = cls.__get_cache(game, version)
+            if existing:
+                return existing
+            obj = super().__new__(cls)
+            obj._load(get_or_create(HOYOVERSEDB.event_reminders, {"game": game.value, "version": version}, cls._document(game, version)))
+            return obj
+
+    def _load(self, gld: dict[str, Any]) -> None:
+        gld = WRITER.overlay(HOYOVERSEDB.event_reminders, {"game": gld["game"], "version": gld["version"]}, gld)
         self.game: Game = Game(gld["game"])
         self.version: str = gld["version"]
         self.rtype: str = gld["rtype"]
@@ -363,29 +600,69 @@ class EventReminder:
         self.image: str | None = gld["image"]
         self.published: bool = gld["published"]
         self.events: list[tuple[int, int]] = gld["events"] if gld["events"] else [] # Temporarily stores all created events, cleaned after analytics concluded
+
+        self.cache[self.game][self.version] = self
+
+    @classmethod
+    async def fetch(cls, game: Game, version: str) -> "EventReminder":
+        existing = cls.__get_cache(game, version)
+        if existing:
+            return existing
+        return await run_in_executor(cls._create, game, version)
+
+    @classmethod
+    def _refresh(cls, gld: dict[str, Any]) -> None:
+        cached = cls.cache[Game(gld["game"])].get(gld["version"])
+        if cached:
+            cached._load(gld)
+
+    @classmethod
+    def _cached_filter(cls) -> dict[str, Any] | None:
+        games = [{"game": game.value, "version": {"$in": list(versions)}} for game, versions in cls.cache.items() if versions]
+        return {"$or": games} if games else None
+
+    @staticmethod
+    def _key(gld: dict[str, Any]) -> tuple[Game, str]:
+        return Game(gld["game"]), gld["version"]
+
+    @classmethod
+    def _cached_keys(cls) -> list[tuple[Game, str]]:
+        return [(game, version) for game, versions in cls.cache.items() for version in list(versions)]
+
+    @classmethod
+    def _evict(cls, key: tuple[Game, str]) -> None:
+        cls.cache[key[0]].pop(key[1], None)
     
     def _update_val(self, key: str, value: any, operator: str = "$set") -> None:
         self.__setattr__(key, value)
-        HOYOVERSEDB.event_reminders.update_one({"game": self.game.value, "version": self.version}, {operator: {key: value}})
+        WRITER.update(HOYOVERSEDB.event_reminders, {"game": self.game.value, "version": self.version}, operator, key, value)
+
+    async def addEvents(self, events: list[tuple[int, int]]) -> None:
+        """Append created (guild, event) pairs, used to checkpoint event creation"""
+        self.events.extend(events)
+        await ASYNC_HOYOVERSEDB.event_reminders.update_one({"game": self.game.value, "version": self.version}, {"$push": {"events": {"$each": events}}})
+
+    @staticmethod
+    def _document(game: Game, version: str) -> dict[str, Any]:
+        return {
+            "game": game.value,
+            "version": version,
+            "rtype": "update_stream",
+            "title": None,
+            "start": None,
+            "end": None,
+            "image": None,
+            "published": False,
+            "events": []
+        }
 
     @classmethod
     def addEventReminder(self, game: Game, version: str):
-        HOYOVERSEDB.event_reminders.insert_one(
-            {
-                "game": game.value,
-                "version": version,
-                "rtype": "update_stream",
-                "title": None,
-                "start": None,
-                "end": None,
-                "image": None,
-                "published": False,
-                "events": []
-            }
-        )
+        HOYOVERSEDB.event_reminders.insert_one(self._document(game, version))
 
 class SpecialProgram: # Update to only store data
     cache = {Game.GENSHIN: {}, Game.STARRAIL: {}, Game.ZZZ: {}}
+    _loading: KeyedLock[tuple[Game, str]] = KeyedLock()
 
     @classmethod
     def __get_cache(cls, game: Game, version: str):
@@ -394,37 +671,93 @@ class SpecialProgram: # Update to only store data
         existing = cls.__get_cache(game, version)
         if existing:
             return existing
-        guild = super().__new__(cls)
-        return guild
-    def __init__(self, game: Game, version: str):
-        if version in self.cache[game]:
-            return
-        gld = HOYOVERSEDB.special_programs.find_one({"game": game.value, "version": version})
-        if not gld:
-            self.addSpecialProgram(game, version)
-            gld = HOYOVERSEDB.special_programs.find_one({"game": game.value, "version": version})
-        self.game = game
-        self.version = version
+        return cls._create(game, version)
+
+    @classmethod
+    def _create(cls, game: Game, version: str) -> "SpecialProgram":
+        with cls._loading((game, version)):
+            existing = cls.__get_cache(game, version)
+            if existing:
+                return existing
+            obj = super().__new__(cls)
+            obj._load(get_or_create(HOYOVERSEDB.special_programs, {"game": game.value, "version": version}, cls._document(game, version)))
+            return obj
+
+    def _load(self, gld: dict[str, Any]) -> None:
+        gld = WRITER.overlay(HOYOVERSEDB.special_programs, {"game": gld["game"], "version": gld["version"]}, gld)
+        self.game = Game(gld["game"])
+        self.version = gld["version"]
         self.found = gld["found"]
         self.published = gld["published"]
         self.image: str | None = gld["image"]
         self.expire_unix: int | None = gld["expire_unix"]
         self.codes: list[Code] = [Code(self.game, x) for x in gld["codes"]] if gld["codes"] else []
 
-        self.cache[game][version] = self
+        self.cache[self.game][self.version] = self
+
+    @classmethod
+    async def fetch(cls, game: Game, version: str) -> "SpecialProgram":
+        existing = cls.__get_cache(game, version)
+        if existing:
+            return existing
+        return await run_in_executor(cls._create, game, version)
+
+    @classmethod
+    def _refresh(cls, gld: dict[str, Any]) -> None:
+        cached = cls.cache[Game(gld["game"])].get(gld["version"])
+        if cached:
+            cached._load(gld)
+        RENDERS.invalidate(Game(gld["game"]), gld["version"])
+
+    @classmethod
+    def _cached_filter(cls) -> dict[str, Any] | None:
+        games = [{"game": game.value, "version": {"$in": list(versions)}} for game, versions in cls.cache.items() if versions]
+        return {"$or": games} if games else None
+
+    @staticmethod
+    def _key(gld: dict[str, Any]) -> tuple[Game, str]:
+        return Game(gld["game"]), gld["version"]
+
+    @classmethod
+    def _cached_keys(cls) -> list[tuple[Game, str]]:
+        return [(game, version) for game, versions in cls.cache.items() for version in list(versions)]
+
+    @classmethod
+    def _evict(cls, key: tuple[Game, str]) -> None:
+        cls.cache[key[0]].pop(key[1], None)
+        RENDERS.invalidate(*key)
     
     def _update_val(self, key: str, value: any, operator: str = "$set") -> None:
-        HOYOVERSEDB.special_programs.update_one({"game": self.game.value, "version": self.version}, {operator: {key: value}})
+        WRITER.update(HOYOVERSEDB.special_programs, {"game": self.game.value, "version": self.version}, operator, key, value)
 
     # Move to hoyolabCodes UI
     async def buildMessage(self, client: discord.Client, locale: discord.Locale) -> tuple[View, Embed, list[discord.File]]:
+        view = self.buildView(locale)
+        embed = self.buildEmbed(locale)
+        attachments = [ASSETS.thumbnail(self.game)]
+
+        return view, embed, attachments
+
+    def buildView(self, locale: discord.Locale) -> View:
+        """Rendered once per locale until the codes change, the view is shared and must not be modified"""
+        return RENDERS.get(("special_program.view", self.game, self.version, locale), lambda: self._buildView(locale))
+
+    def _buildView(self, locale: discord.Locale) -> View:
         view = View(author=None, locale=locale)
+        for code in self.codes:
+            view.add_item(item=Button(label=code.code, url=HOYO_REDEEM_URLS[self.game] + code.code))
+        return view
+
+    def buildEmbed(self, locale: discord.Locale) -> Embed:
+        """Rendered once per locale until the codes or image change, the embed is shared and must not be modified"""
+        return RENDERS.get(("special_program.embed", self.game, self.version, locale), lambda: self._buildEmbed(locale))
+
+    def _buildEmbed(self, locale: discord.Locale) -> Embed:
         codes = ""
         if self.codes:
+            DIRECT_LINK_STR = LocaleStr(key="direct_link").translate(locale)
             for code in self.codes:
-                DIRECT_LINK_STR = LocaleStr(key="direct_link").translate(locale)
                 codes += f"{code.code} | **[{DIRECT_LINK_STR}]({HOYO_REDEEM_URLS[self.game] + code.code})**\n"
-                view.add_item(item=Button(label=code.code, url=HOYO_REDEEM_URLS[self.game] + code.code))
         
         embed = Embed(
             locale=locale,
@@ -436,16 +769,14 @@ class SpecialProgram: # Update to only store data
         embed.add_field(name=emojis.CODES1+emojis.CODES2+emojis.CODES3, value=codes if self.codes else LocaleStr(key="no_codes_found"))
         if self.image:
             embed.set_image(url=self.image)
-
-        attachments = [discord.File("./zenox-assets/assets/genshin-impact/thumbnails/" + GAME_THUMBNAILS[self.game], filename="thumbnail.png")]
-
-        return view, embed, attachments
+        return embed
 
     def addCode(self, code: Code):
         if self.codes and any(x.code == code.code for x in self.codes): # Prevent Duplicates
             return
         self.codes.append(code)
         self._update_val(key="codes", value=code.code, operator="$push")
+        RENDERS.invalidate(self.game, self.version)
     
     def mark(self, typ: Literal["found", "published"]):
         if not self.__getattribute__(typ):
@@ -459,17 +790,20 @@ class SpecialProgram: # Update to only store data
     def updateImage(self, img: str):
         self.image = img
         self._update_val("image", img)
+        RENDERS.invalidate(self.game, self.version)
+
+    @staticmethod
+    def _document(game: Game, version: str) -> dict[str, Any]:
+        return {
+            "game": game.value,
+            "version": version,
+            "found": False,
+            "published": False,
+            "image": None,
+            "expire_unix": None,
+            "codes": []
+        }
 
     @classmethod
     def addSpecialProgram(self, game: Game, version: str):
-        HOYOVERSEDB.special_programs.insert_one(
-            {
-                "game": game.value,
-                "version": version,
-                "found": False,
-                "published": False,
-                "image": None,
-                "expire_unix": None,
-                "codes": []
-            }
-        )
\ No newline at end of file
+        HOYOVERSEDB.special_programs.insert_one(self._document(game, version))
\ No newline at end of file
@@ -0,0 +1,123 @@
+import asyncio
+import discord
+from typing import Any, NamedTuple, TYPE_CHECKING
+from .mongodb import ASYNC_DB
+from ..static.constants import DatabaseKey
+from ..static.enums import Game
+
+if TYPE_CHECKING:
+    from .structures import GuildConfig
+
+class Subscription(NamedTuple):
+    guild_id: int
+    channel_id: int
+    role_ping: int | None
+    everyone_ping: bool
+    language: discord.Locale
+
+class SubscriptionIndex:
+    """In-memory index of the guilds subscribed to code announcements and stream reminders per game
+
+    Built from one projected query over the subscribed guilds on first use, then kept current by `GuildConfig`
+    whenever a guild is loaded, changed or removed, so publish jobs only touch subscribers.
+    """
+
+    def __init__(self):
+        self.codes: dict[Game, dict[int, Subscription]] = {game: {} for game in Game}
+        self.streams: dict[Game, dict[int, discord.Locale]] = {game: {} for game in Game}
+        self._loaded = False
+        self._loading: asyncio.Lock | None = None
+        # Guilds updated before the snapshot is complete keep their live entries
+        self._touched: set[int] | None = set()
+
+    @staticmethod
+    def _query() -> dict[str, Any]:
+        return {"$or": [
+            *({f"{DatabaseKey[game]}.codes_config.channel": {"$ne": None}} for game in Game),
+            *({f"{DatabaseKey[game]}.event_reminders.streams": True} for game in Game)
+        ]}
+
+    @staticmethod
+    def _projection() -> dict[str, int]:
+        return {"_id": 0, "id": 1, "language": 1, **{DatabaseKey[game]: 1 for game in Game}}
+
+    async def load(self) -> None:
+        if self._loaded:
+            return
+        if self._loading is None:
+            self._loading = asyncio.Lock()
+        async with self._loading:
+            if self._loaded:
+                return
+            codes: dict[Game, dict[int, Subscription]] = {game: {} for game in Game}
+            streams: dict[Game, dict[int, discord.Locale]] = {game: {} for game in Game}
+            async for gld in ASYNC_DB.guilds.iterate(self._query(), self._projection()):
+                self._index_document(codes, streams, gld)
+            for game in Game:
+                for guild_id in self._touched:
+                    codes[game].pop(guild_id, None)
+                    streams[game].pop(guild_id, None)
+                    if guild_id in self.codes[game]:
+                        codes[game][guild_id] = self.codes[game][guild_id]
+                    if guild_id in self.streams[game]:
+                        streams[game][guild_id] = self.streams[game][guild_id]
+            self.codes, self.streams = codes, streams
+            self._touched = None
+            self._loaded = True
+
+    @staticmethod
+    def _index_document(codes: dict[Game, dict[int, Subscription]], streams: dict[Game, dict[int, discord.Locale]], gld: dict[str, Any]) -> None:
+        language = discord.Locale(gld["language"])
+        for game in Game:
+            config = gld[DatabaseKey[game]]
+            if config["codes_config"]["channel"]:
+                codes[game][gld["id"]] = Subscription(
+                    gld["id"], config["codes_config"]["channel"], config["codes_config"]["role_ping"],
+                    config["codes_config"]["everyone_ping"], language
+                )
+            else:
+                codes[game].pop(gld["id"], None)
+            if config["event_reminders"]["streams"]:
+                streams[game][gld["id"]] = language
+            else:
+                streams[game].pop(gld["id"], None)
+
+    def update_document(self, gld: dict[str, Any]) -> None:
+        """Reflect a guild document changed elsewhere (e.g. by another process) in the index"""
+        if self._touched is not None:
+            self._touched.add(gld["id"])
+        self._index_document(self.codes, self.streams, gld)
+
+    def update(self, guild: "GuildConfig") -> None:
+        """Reflect the current state of `guild` in the index"""
+        if self._touched is not None:
+            self._touched.add(guild.id)
+        for game in Game:
+            config = guild.codes_config[game]
+            if config.channel:
+                self.codes[game][guild.id] = Subscription(guild.id, config.channel, config.role_ping, config.everyone_ping, guild.language)
+            else:
+                self.codes[game].pop(guild.id, None)
+            if guild.event_reminders[game].streams:
+                self.streams[game][guild.id] = guild.language
+            else:
+                self.streams[game].pop(guild.id, None)
+
+    def remove(self, guild_id: int) -> None:
+        if self._touched is not None:
+            self._touched.add(guild_id)
+        for game in Game:
+            self.codes[game].pop(guild_id, None)
+            self.streams[game].pop(guild_id, None)
+
+    async def code_subscribers(self, game: Game) -> list[Subscription]:
+        """Guilds with a codes channel configured for `game`"""
+        await self.load()
+        return list(self.codes[game].values())
+
+    async def stream_subscribers(self, game: Game) -> dict[int, discord.Locale]:
+        """Guilds with stream reminders enabled for `game`, mapped to their language"""
+        await self.load()
+        return dict(self.streams[game])
+
+SUBSCRIPTIONS = SubscriptionIndex()
@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import os
+import threading
+import bson
+from loguru import logger
+from typing import Any, Callable, Hashable, Literal
+from pymongo import collection
+from pymongo.errors import OperationFailure, PyMongoError
+from .mongodb import DB, HOYOVERSEDB, AsyncCollection
+from .structures import GuildConfig, UserConfig, Code, EventReminder, SpecialProgram
+
+# Server error returned by `watch()` when the deployment isn't a replica set
+CHANGE_STREAMS_UNSUPPORTED = 40573
+PIPELINE = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}]
+
+class WatchTarget:
+    def __init__(self, name: str, coll: Callable[[], collection.Collection], structure: type):
+        self.name = name
+        self.collection = coll
+        # `_refresh(document)` updates or evicts the cached object, `_cached_filter()` matches every cached document
+        self.refresh: Callable[[dict[str, Any]], None] = structure._refresh
+        self.cached_filter: Callable[[], dict[str, Any] | None] = structure._cached_filter
+        # `_key(document)` is the cache key of a document, `_evict(key)` drops an object whose document was deleted
+        self.key: Callable[[dict[str, Any]], Hashable] = structure._key
+        self.cached_keys: Callable[[], list[Hashable]] = structure._cached_keys
+        self.evict: Callable[[Hashable], None] = structure._evict
+
+TARGETS = [
+    WatchTarget("guilds", lambda: DB.guilds, GuildConfig),
+    WatchTarget("users", lambda: DB.users, UserConfig),
+    WatchTarget("codes", lambda: HOYOVERSEDB.codes, Code),
+    WatchTarget("event_reminders", lambda: HOYOVERSEDB.event_reminders, EventReminder),
+    WatchTarget("special_programs", lambda: HOYOVERSEDB.special_programs, SpecialProgram)
+]
+
+class CacheWatcher:
+    """Keeps cached config objects in sync with writes made by other processes
+
+    In `stream` mode every collection is tailed with a change stream on its own thread and changed documents are applied
+    to the cache on the event loop, resuming from the last token after errors. Deployments without change streams
+    (standalone servers) fall back to `poll` mode, which re-reads the cached documents every `poll_interval` seconds and
+    applies those seen for the first time or whose content changed. Cached objects whose document is gone are evicted,
+    in `stream` mode by re-reading the cached documents of a collection after a delete event, which carries only `_id`.
+    """
+
+    def __init__(self, mode: Literal["stream", "poll"] = "stream", *, poll_interval: float = 30):
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopped = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._tasks: list[asyncio.Task] = []
+
+    @classmethod
+    def from_env(cls) -> "CacheWatcher | None":
+        mode = os.getenv("MONGODB_WATCH")
+        if not mode:
+            return None
+        return cls(mode, poll_interval=float(os.getenv("MONGODB_WATCH_INTERVAL", 30)))
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        for target in TARGETS:
+            if self.mode == "stream":
+                thread = threading.Thread(target=self._stream, args=(target,), name=f"watch-{target.name}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            else:
+                self._poll(target)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        for task in self._tasks:
+            task.cancel()
+
+    def _poll(self, target: WatchTarget) -> None:
+        self._tasks.append(self._loop.create_task(self._poll_loop(target)))
+
+    def _stream(self, target: WatchTarget) -> None:
+        token = None
+        while not self._stopped.is_set():
+            try:
+                with target.collection().watch(PIPELINE, full_document="updateLookup", resume_after=token, max_await_time_ms=1000) as stream:
+                    while not self._stopped.is_set():
+                        change = stream.try_next()
+                        token = stream.resume_token
+                        if change and change["operationType"] == "delete":
+                            self._loop.call_soon_threadsafe(self._evict_deleted, target)
+                        elif change and change.get("fullDocument"):
+                            self._loop.call_soon_threadsafe(self._apply, target, change["fullDocument"])
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning(f"Change streams unavailable for {target.name}, polling every {self.poll_interval}s instead")
+                    self._loop.call_soon_threadsafe(self._poll, target)
+                    return
+                logger.exception(f"Change stream for {target.name} failed, resuming")
+                self._stopped.wait(5)
+            except PyMongoError:
+                logger.exception(f"Change stream for {target.name} failed, resuming")
+                self._stopped.wait(5)
+
+    async def _cached_documents(self, target: WatchTarget) -> tuple[list[Hashable], list[dict[str, Any]]] | None:
+        """The cached keys and their documents, keys are taken first so objects cached during the query aren't evicted"""
+        keys = target.cached_keys()
+        query = target.cached_filter()
+        if query is None:
+            return None
+        try:
+            return keys, await AsyncCollection(target.collection()).find(query)
+        except PyMongoError:
+            logger.exception(f"Reading cached {target.name} failed")
+            return None
+
+    def _evict_missing(self, target: WatchTarget, keys: list[Hashable], documents: list[dict[str, Any]]) -> None:
+        found = {target.key(document) for document in documents}
+        for key in keys:
+            if key not in found:
+                target.evict(key)
+
+    def _evict_deleted(self, target: WatchTarget) -> None:
+        async def evict() -> None:
+            if cached := await self._cached_documents(target):
+                self._evict_missing(target, *cached)
+        self._tasks.append(self._loop.create_task(evict()))
+        self._tasks = [task for task in self._tasks if not task.done()]
+
+    async def _poll_loop(self, target: WatchTarget) -> None:
+        digests: dict[Any, bytes] = {}
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            cached = await self._cached_documents(target)
+            if cached is None:
+                continue
+            keys, documents = cached
+            self._evict_missing(target, keys, documents)
+            seen: dict[Any, bytes] = {}
+            for document in documents:
+                key = document.pop("_id")
+                seen[key] = hashlib.blake2b(bson.encode(document), digest_size=16).digest()
+                # Documents seen for the first time are applied too, they may have changed since they were loaded
+                if digests.get(key) != seen[key]:
+                    self._apply(target, document)
+            digests = seen
+
+    def _apply(self, target: WatchTarget, document: dict[str, Any]) -> None:
+        try:
+            target.refresh(document)
+        except Exception:
+            logger.exception(f"Failed to apply change to cached {target.name}")
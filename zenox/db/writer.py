@@ -0,0 +1,174 @@
+import asyncio
+import os
+import threading
+import time
+from loguru import logger
+from typing import Any
+from pymongo import UpdateOne, collection
+from pymongo.errors import BulkWriteError, PyMongoError
+from .mongodb import run_in_executor
+from ..metrics import DB_WRITES_BUFFERED, DB_WRITES_FLUSHED, DB_FLUSH_LATENCY
+
+ACCUMULATING_OPERATORS = ("$push", "$addToSet")
+
+def _overlaps(a: str, b: str) -> bool:
+    return a == b or a.startswith(b + ".") or b.startswith(a + ".")
+
+def _merge(update: dict[str, dict[str, Any]], operator: str, key: str, value: Any) -> bool:
+    """Merge one field update into `update`, returns False if it would conflict with a field already in it"""
+    for op, fields in update.items():
+        for path in fields:
+            if _overlaps(path, key) and not (op == operator and path == key and operator in ("$set", *ACCUMULATING_OPERATORS)):
+                return False
+    if operator in ACCUMULATING_OPERATORS:
+        update.setdefault(operator, {}).setdefault(key, {"$each": []})["$each"].append(value)
+    else:
+        update.setdefault(operator, {})[key] = value
+    return True
+
+def _apply(document: dict[str, Any], update: dict[str, dict[str, Any]]) -> None:
+    for operator, fields in update.items():
+        for path, value in fields.items():
+            *parents, field = path.split(".")
+            target = document
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            if operator == "$set":
+                target[field] = value
+            elif operator == "$unset":
+                target.pop(field, None)
+            elif operator in ACCUMULATING_OPERATORS:
+                items = target.get(field) or []
+                for item in value["$each"]:
+                    if operator == "$push" or item not in items:
+                        items.append(item)
+                target[field] = items
+
+class WriteBuffer:
+    """Write-behind buffer for field updates on single documents
+
+    Updates to the same document are coalesced into one update (last `$set` wins, `$push`/`$addToSet` accumulate with
+    `$each`) and flushed with one ordered `bulk_write` per collection every `interval` seconds and on shutdown. When an
+    update is rejected, the updates after it in the batch are queued again for the next flush.
+    Documents loaded while they still have pending or in-flight updates are patched with `overlay`, so a reload never
+    sees stale data. Until `start` is called (scripts, tests) every update is written through immediately.
+    """
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending: dict[tuple[str, tuple], list[dict[str, dict[str, Any]]]] = {}
+        # Updates taken by the running flush, visible to `overlay` until their collection's write returned
+        self._inflight: dict[tuple[str, tuple], list[dict[str, dict[str, Any]]]] = {}
+        self._filters: dict[tuple[str, tuple], dict[str, Any]] = {}
+        self._collections: dict[str, collection.Collection] = {}
+        self._task: asyncio.Task | None = None
+        self._flushing = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @staticmethod
+    def _key(coll: collection.Collection, filter: dict[str, Any]) -> tuple[str, tuple]:
+        return coll.full_name, tuple(sorted(filter.items()))
+
+    def update(self, coll: collection.Collection, filter: dict[str, Any], operator: str, key: str, value: Any) -> None:
+        if not self.running:
+            coll.update_one(filter, {operator: {key: value}})
+            return
+        doc_key = self._key(coll, filter)
+        with self._lock:
+            self._collections[coll.full_name] = coll
+            self._filters[doc_key] = filter
+            updates = self._pending.setdefault(doc_key, [])
+            if not updates or not _merge(updates[-1], operator, key, value):
+                updates.append({})
+                _merge(updates[-1], operator, key, value)
+        DB_WRITES_BUFFERED.labels(coll.name).inc()
+
+    def overlay(self, coll: collection.Collection, filter: dict[str, Any], document: dict[str, Any]) -> dict[str, Any]:
+        """Apply updates that haven't been written yet to a freshly loaded `document`"""
+        doc_key = self._key(coll, filter)
+        with self._lock:
+            updates = self._inflight.get(doc_key, []) + self._pending.get(doc_key, [])
+        for update in updates:
+            _apply(document, update)
+        return document
+
+    def discard(self, coll: collection.Collection, filter: dict[str, Any]) -> None:
+        """Drop pending updates, e.g. when the document is deleted"""
+        with self._lock:
+            self._pending.pop(self._key(coll, filter), None)
+            self._filters.pop(self._key(coll, filter), None)
+            self._inflight.pop(self._key(coll, filter), None)
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        # Waits for a flush that is still writing before flushing the rest
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                # Shielded so `stop` never interrupts a batch that was already taken from the buffer
+                await asyncio.shield(self.flush())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Failed to flush buffered writes")
+
+    async def flush(self) -> None:
+        async with self._flushing:
+            with self._lock:
+                pending, filters = self._pending, self._filters
+                self._pending, self._filters = {}, {}
+                self._inflight = {doc_key: list(updates) for doc_key, updates in pending.items()}
+            try:
+                for name in {doc_key[0] for doc_key in pending}:
+                    await self._flush_collection(name, pending, filters)
+            finally:
+                with self._lock:
+                    self._inflight = {}
+
+    async def _flush_collection(self, name: str, pending, filters) -> None:
+        coll = self._collections[name]
+        entries = [(doc_key, update) for doc_key, updates in pending.items() if doc_key[0] == name for update in updates]
+        operations = [UpdateOne(filters[doc_key], update) for doc_key, update in entries]
+        written, retry = len(entries), []
+        start = time.perf_counter()
+        try:
+            await run_in_executor(coll.bulk_write, operations, ordered=True)
+        except BulkWriteError as e:
+            # The rejected update won't succeed on a retry, the ones after it were never attempted
+            error = e.details["writeErrors"][0]
+            logger.error(f"Buffered write to {name} rejected: {error}")
+            written, retry = error["index"], entries[error["index"] + 1:]
+        except PyMongoError:
+            logger.exception(f"Failed to flush buffered writes to {name}, retrying")
+            written, retry = 0, entries
+        finally:
+            DB_FLUSH_LATENCY.labels(coll.name).observe(time.perf_counter() - start)
+            self._requeue(name, retry, filters)
+        DB_WRITES_FLUSHED.labels(coll.name).inc(written)
+
+    def _requeue(self, name: str, entries: list[tuple[tuple[str, tuple], dict[str, dict[str, Any]]]], filters) -> None:
+        """Put `entries` back in front of the updates buffered since, and drop the collection from the in-flight ones"""
+        retry: dict[tuple[str, tuple], list[dict[str, dict[str, Any]]]] = {}
+        for doc_key, update in entries:
+            retry.setdefault(doc_key, []).append(update)
+        with self._lock:
+            for doc_key in [doc_key for doc_key in self._inflight if doc_key[0] == name]:
+                del self._inflight[doc_key]
+            for doc_key, updates in retry.items():
+                self._pending[doc_key] = updates + self._pending.get(doc_key, [])
+                self._filters[doc_key] = filters[doc_key]
+
+WRITER = WriteBuffer(interval=float(os.getenv("MONGODB_WRITE_INTERVAL", 1)))
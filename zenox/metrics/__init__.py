@@ -8,7 +8,18 @@ from .metrics import (
     CPU_USAGE_GAUGE,
     MEMORY_USAGE_GAUGE,
     GUILD_LOCALE_GAUGE,
-    UPTIME_GAUGE
+    UPTIME_GAUGE,
+    CACHE_HITS,
+    CACHE_MISSES,
+    CACHE_EVICTIONS,
+    CACHE_SIZE,
+    DB_WRITES_BUFFERED,
+    DB_WRITES_FLUSHED,
+    DB_FLUSH_LATENCY,
+    DB_OPERATION_LATENCY,
+    DB_OPERATION_ERRORS,
+    PAGE_CACHE_RESULTS,
+    HOYOLAB_REQUEST_LATENCY
 )
 
 __all__ = [
@@ -21,5 +32,16 @@ __all__ = [
     "CPU_USAGE_GAUGE",
     "MEMORY_USAGE_GAUGE",
     "GUILD_LOCALE_GAUGE",
-    "UPTIME_GAUGE"
+    "UPTIME_GAUGE",
+    "CACHE_HITS",
+    "CACHE_MISSES",
+    "CACHE_EVICTIONS",
+    "CACHE_SIZE",
+    "DB_WRITES_BUFFERED",
+    "DB_WRITES_FLUSHED",
+    "DB_FLUSH_LATENCY",
+    "DB_OPERATION_LATENCY",
+    "DB_OPERATION_ERRORS",
+    "PAGE_CACHE_RESULTS",
+    "HOYOLAB_REQUEST_LATENCY"
 ]
\ No newline at end of file
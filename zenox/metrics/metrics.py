@@ -1,4 +1,4 @@
-from prometheus_client import Gauge, Counter
+from prometheus_client import Gauge, Counter, Histogram
 
 METRIC_PREFIX = "discord_"
 
@@ -53,4 +53,72 @@ GUILD_LOCALE_GAUGE = Gauge(
 UPTIME_GAUGE = Gauge(
     METRIC_PREFIX + "uptime",
     "Start time of the bot",
-)
\ No newline at end of file
+)
+
+CACHE_HITS = Counter(
+    METRIC_PREFIX + "cache_hits",
+    "Lookups served from an in-memory cache",
+    ["cache"]
+)
+
+CACHE_MISSES = Counter(
+    METRIC_PREFIX + "cache_misses",
+    "Lookups that had to be loaded from the database",
+    ["cache"]
+)
+
+CACHE_EVICTIONS = Counter(
+    METRIC_PREFIX + "cache_evictions",
+    "Entries removed from an in-memory cache",
+    ["cache", "reason"]
+)
+
+CACHE_SIZE = Gauge(
+    METRIC_PREFIX + "cache_size",
+    "Number of entries held by an in-memory cache",
+    ["cache"]
+)
+
+DB_WRITES_BUFFERED = Counter(
+    METRIC_PREFIX + "db_writes_buffered",
+    "Field updates queued in the write-behind buffer",
+    ["collection"]
+)
+
+DB_WRITES_FLUSHED = Counter(
+    METRIC_PREFIX + "db_writes_flushed",
+    "Coalesced document updates written by the write-behind buffer",
+    ["collection"]
+)
+
+DB_FLUSH_LATENCY = Histogram(
+    METRIC_PREFIX + "db_flush_latency",
+    "Duration of a write-behind buffer flush in seconds",
+    ["collection"]
+)
+
+DB_OPERATION_LATENCY = Histogram(
+    METRIC_PREFIX + "db_operation_latency",
+    "Duration of a MongoDB command in seconds",
+    ["collection", "operation"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+DB_OPERATION_ERRORS = Counter(
+    METRIC_PREFIX + "db_operation_errors",
+    "MongoDB commands that failed",
+    ["collection", "operation"]
+)
+
+PAGE_CACHE_RESULTS = Counter(
+    METRIC_PREFIX + "page_cache_results",
+    "Scraped page fetches by outcome (not_modified, unchanged, parsed)",
+    ["page", "result"]
+)
+
+HOYOLAB_REQUEST_LATENCY = Histogram(
+    METRIC_PREFIX + "hoyolab_request_latency",
+    "Duration of a HoYoLAB API request in seconds, status is the HTTP status or the error type",
+    ["game", "status"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15)
+)
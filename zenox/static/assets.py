@@ -0,0 +1,54 @@
+import io
+import os
+import discord
+from .constants import GAME_THUMBNAILS
+from .enums import Game
+
+ASSETS_DIR = "./zenox-assets/assets"
+
+class AssetStore:
+    """Asset files read once and shared by every message that attaches them
+
+    `file` wraps the cached bytes in a new `BytesIO`, which shares the buffer until written to, so handing out a
+    `discord.File` per send costs no disk access and no copy. Files replaced on disk need an `invalidate`.
+    """
+
+    def __init__(self):
+        self._bytes: dict[str, bytes] = {}
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normpath(path)
+
+    def read(self, path: str) -> bytes:
+        key = self._key(path)
+        data = self._bytes.get(key)
+        if data is None:
+            with open(key, "rb") as f:
+                data = self._bytes[key] = f.read()
+        return data
+
+    def exists(self, path: str) -> bool:
+        return self._key(path) in self._bytes or os.path.isfile(path)
+
+    def bytesio(self, path: str) -> io.BytesIO:
+        return io.BytesIO(self.read(path))
+
+    def file(self, path: str, filename: str) -> discord.File:
+        return discord.File(self.bytesio(path), filename=filename)
+
+    def invalidate(self, path: str) -> None:
+        self._bytes.pop(self._key(path), None)
+
+    @staticmethod
+    def thumbnail_path(game: Game) -> str:
+        return f"{ASSETS_DIR}/genshin-impact/thumbnails/{GAME_THUMBNAILS[game]}"
+
+    def thumbnail(self, game: Game) -> discord.File:
+        return self.file(self.thumbnail_path(game), "thumbnail.png")
+
+    @staticmethod
+    def event_image_path(image: str) -> str:
+        return f"{ASSETS_DIR}/event-reminders/{image}"
+
+ASSETS = AssetStore()
@@ -15,4 +15,8 @@ class WikiCodesHeaderMismatchError(ZenoxException):
 
 class WikiCodesDataMismatchError(ZenoxException):
     def __init__(self, reason: str):
-        super().__init__("Mismatching Wiki Codes Data", reason)
\ No newline at end of file
+        super().__init__("Mismatching Wiki Codes Data", reason)
+
+class CollectionScanError(ZenoxException):
+    def __init__(self, queries: list[str]):
+        super().__init__("Collection Scan", "Queries without a usable index: " + ", ".join(queries))
@@ -0,0 +1,76 @@
+import asyncio
+import hashlib
+import aiohttp
+from concurrent.futures import Executor
+from typing import Callable, Generic, TypeVar
+from ..metrics import CACHE_HITS, CACHE_MISSES, PAGE_CACHE_RESULTS
+
+T = TypeVar("T")
+
+class CachedPage(Generic[T]):
+    __slots__ = ("etag", "last_modified", "digest", "value")
+
+    def __init__(self, etag: str | None, last_modified: str | None, digest: bytes, value: T):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.value = value
+
+class PageCache(Generic[T]):
+    """Parsed pages keyed by URL, revalidated with conditional GETs
+
+    A page is only parsed again when the server answers with new content (not 304) and the hash of the part
+    returned by `extract` changed, so edits elsewhere on the page (ads, sidebars, other tables) don't trigger a parse.
+    Results are counted per page as `not_modified`, `unchanged` or `parsed`, the first two also as cache hits.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._pages: dict[str, CachedPage[T]] = {}
+
+    def _record(self, url: str, result: str) -> None:
+        PAGE_CACHE_RESULTS.labels(url, result).inc()
+        (CACHE_MISSES if result == "parsed" else CACHE_HITS).labels(self.name).inc()
+
+    async def fetch(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        parse: Callable[[str], T],
+        *,
+        extract: Callable[[str], str] = lambda html: html,
+        executor: Executor | None = None,
+        timeout: aiohttp.ClientTimeout | None = None
+    ) -> T:
+        """Fetch `url` and return `parse(html)`, reusing the previous result if the page didn't change
+
+        `parse` runs on `executor`, `extract` runs on the event loop and should be cheap (e.g. slicing out a table).
+        """
+        cached = self._pages.get(url)
+        headers = {}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        async with session.get(url, headers=headers, timeout=timeout) as response:
+            if cached and response.status == 304:
+                self._record(url, "not_modified")
+                return cached.value
+            response.raise_for_status()
+            html = await response.text()
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+        digest = hashlib.blake2b(extract(html).encode(), digest_size=16).digest()
+        if cached and cached.digest == digest:
+            cached.etag, cached.last_modified = etag, last_modified
+            self._record(url, "unchanged")
+            return cached.value
+
+        value = await asyncio.get_running_loop().run_in_executor(executor, parse, html)
+        self._pages[url] = CachedPage(etag, last_modified, digest, value)
+        self._record(url, "parsed")
+        return value
+
+    def invalidate(self, url: str) -> None:
+        self._pages.pop(url, None)
@@ -0,0 +1,29 @@
+import os
+from typing import Any, Callable, Hashable, TypeVar
+from ..db.cache import TTLCache
+
+T = TypeVar("T")
+
+class RenderCache:
+    """Messages rendered once per locale and shared by every guild that uses the locale
+
+    Keys are `(kind, game, version or code set, locale)`. Cached embeds and views are shared between sends and must
+    not be modified by callers. Entries of a game and version are dropped with `invalidate` when their content changes.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float):
+        self._cache: TTLCache[tuple, Any] = TTLCache("renders", maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: tuple[str, Any, Hashable, Any], build: Callable[[], T]) -> T:
+        rendered = self._cache.get(key)
+        if rendered is None:
+            rendered = build()
+            self._cache[key] = rendered
+        return rendered
+
+    def invalidate(self, game: Any, version: Hashable) -> None:
+        for key in self._cache:
+            if key[1] == game and key[2] == version:
+                self._cache.invalidate(key)
+
+RENDERS = RenderCache(maxsize=int(os.getenv("RENDER_CACHE_SIZE", 1000)), ttl=float(os.getenv("RENDER_CACHE_TTL", 86400)))
@@ -12,11 +12,18 @@ from discord.utils import MISSING
 from .enums import Game, GenshinCity
 from.embeds import Embed
 from .constants import VERSION, UTC_8
+from .assets import ASSETS
 from . import emojis
 from ..db.mongodb import DB
 from ..l10n import LocaleStr
 from sentry_sdk.integrations.loguru import LoggingLevels, LoguruIntegration
 from ..static.constants import _supportCache as _cache, ZX_GAME_TO_GPY_GAME
+from .ratelimit import TokenBucket
+
+# HoYoLAB lets an account redeem a code per game every 5 seconds, all requests of the account share one API quota
+REDEEM_COOLDOWN = float(os.getenv("HOYOLAB_REDEEM_COOLDOWN", 5))
+REDEEM_LIMITERS: dict[Game, TokenBucket] = {game: TokenBucket(1 / REDEEM_COOLDOWN, capacity=1) for game in Game}
+HOYOLAB_LIMITER = TokenBucket(float(os.getenv("HOYOLAB_RATE", 2)), capacity=len(Game))
 
 def init_sentry() -> None:
     sentry_sdk.init(
@@ -62,6 +69,8 @@ async def generate_hoyolab_token() -> None:
     dotenv.set_key(env_path, "HOYOLAB_COOKIES", str(cookies))
 
 async def redeem_code(code: str, game: Game) -> int:
+    await REDEEM_LIMITERS[game].acquire()
+    await HOYOLAB_LIMITER.acquire()
     try:
         await genshin.Client(cookies=parse_cookie(os.getenv("HOYOLAB_COOKIES"))).redeem_code(
             code=code,
@@ -72,6 +81,7 @@ async def redeem_code(code: str, game: Game) -> int:
     except genshin.errors.InvalidCookies as e:
         # Refresh cookie and try again
         await generate_hoyolab_token()
+        await HOYOLAB_LIMITER.acquire()
         await genshin.Client(cookies=parse_cookie(os.getenv("HOYOLAB_COOKIES"))).redeem_code(
             code=code,
             game=ZX_GAME_TO_GPY_GAME[game],
@@ -86,9 +96,7 @@ def generate_id(length=5):
     return ''.join(random.choice(characters) for _ in range(length))
 
 def path_to_bytesio(path) -> io.BytesIO:
-    with open(path, "rb") as f:
-        data = f.read()
-    return io.BytesIO(data)
+    return ASSETS.bytesio(path)
 
 def get_repo_version() -> str | None:
     repo = git.Repo()
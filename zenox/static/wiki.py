@@ -0,0 +1,178 @@
+import re
+from html.parser import HTMLParser
+from typing import NamedTuple
+
+# Same normalisation as pandas.read_html, so extracted cells compare equal to what the bot stored before
+_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
+_VOID_TAGS = frozenset({"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"})
+
+class WikiTable(NamedTuple):
+    header: list[str]
+    rows: list[list[str]]
+
+class _Cell(NamedTuple):
+    text: str
+    rowspan: int
+    colspan: int
+    header: bool
+
+def _span(value: str | None) -> int:
+    try:
+        return max(int(value or 1), 1)
+    except ValueError:
+        return 1
+
+class _FirstTableParser(HTMLParser):
+    """Collects the rows of the first table and ignores everything after it
+
+    `<br>` becomes a line break, elements hidden with `display:none` are skipped and nested tables only contribute
+    their text to the enclosing cell, like `pandas.read_html` with lxml.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.found = False
+        self.done = False
+        self.head: list[list[_Cell]] = []
+        self.body: list[list[_Cell]] = []
+        self._depth = 0
+        self._in_head = False
+        self._row: list[_Cell] | None = None
+        self._cell: list[str] | None = None
+        self._cell_attrs: tuple[int, int, bool] = (1, 1, False)
+        self._hidden: str | None = None
+        self._hidden_depth = 0
+
+    def _close_cell(self) -> None:
+        if self._cell is not None and self._row is not None:
+            text = _WHITESPACE.sub(" ", "".join(self._cell).strip())
+            self._row.append(_Cell(text, *self._cell_attrs))
+        self._cell = None
+
+    def _close_row(self) -> None:
+        self._close_cell()
+        if self._row:
+            (self.head if self._in_head else self.body).append(self._row)
+        self._row = None
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if self.done:
+            return
+        if self._hidden:
+            self._hidden_depth += tag == self._hidden
+            return
+        attributes = dict(attrs)
+        if tag not in _VOID_TAGS and "display:none" in (attributes.get("style") or "").replace(" ", ""):
+            self._hidden, self._hidden_depth = tag, 1
+            return
+        if tag == "table":
+            self._depth += 1
+            self.found = True
+        elif self._depth != 1:
+            if tag == "br" and self._cell is not None:
+                self._cell.append("\n")
+        elif tag == "thead":
+            self._close_row()
+            self._in_head = True
+        elif tag in ("tbody", "tfoot"):
+            self._close_row()
+            self._in_head = False
+        elif tag == "tr":
+            self._close_row()
+            self._row = []
+        elif tag in ("td", "th"):
+            self._close_cell()
+            if self._row is None:
+                self._row = []
+            self._cell = []
+            self._cell_attrs = (_span(attributes.get("rowspan")), _span(attributes.get("colspan")), tag == "th")
+        elif tag == "br" and self._cell is not None:
+            self._cell.append("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.done:
+            return
+        if self._hidden:
+            self._hidden_depth -= tag == self._hidden
+            if not self._hidden_depth:
+                self._hidden = None
+            return
+        if tag == "table" and self._depth:
+            self._depth -= 1
+            if not self._depth:
+                self._close_row()
+                self.done = True
+        elif self._depth != 1:
+            return
+        elif tag in ("td", "th"):
+            self._close_cell()
+        elif tag == "tr":
+            self._close_row()
+        elif tag == "thead":
+            self._close_row()
+            self._in_head = False
+
+    def handle_data(self, data: str) -> None:
+        if self._cell is not None and not self._hidden and not self.done:
+            self._cell.append(data)
+
+def _expand_spans(rows: list[list[_Cell]]) -> list[list[str]]:
+    """Repeat the text of cells spanning several columns or rows into each of them"""
+    expanded: list[list[str]] = []
+    remainder: list[tuple[int, str, int]] = []  # (column, text, rows left) of cells spanning into the next row
+    for row in rows:
+        texts: list[str] = []
+        carried: list[tuple[int, str, int]] = []
+        for cell in row:
+            while remainder and remainder[0][0] <= len(texts):
+                column, text, left = remainder.pop(0)
+                texts.append(text)
+                if left > 1:
+                    carried.append((column, text, left - 1))
+            for _ in range(cell.colspan):
+                if cell.rowspan > 1:
+                    carried.append((len(texts), cell.text, cell.rowspan - 1))
+                texts.append(cell.text)
+        for column, text, left in remainder:
+            texts.append(text)
+            if left > 1:
+                carried.append((column, text, left - 1))
+        expanded.append(texts)
+        remainder = carried
+    return expanded
+
+def table_start(html: str) -> int:
+    """Offset of the first `<table>` tag, searched from `<body>` on so markup strings in head scripts are skipped"""
+    body = html.find("<body")
+    return html.find("<table", max(body, 0))
+
+def first_table_markup(html: str) -> str:
+    """The markup of the first table up to its first closing tag, or the whole page if there is none"""
+    start = table_start(html)
+    end = html.find("</table>", start)
+    return html[start:end] if start != -1 and end != -1 else html
+
+def parse_first_table(html: str, *, chunk_size: int = 1 << 16) -> WikiTable:
+    """Extract the header and rows of the first `<table>` in `html`
+
+    Parsing starts at the table and stops once it is closed, the rest of the page is never tokenized. Without a
+    `<thead>`, leading rows made up only of `<th>` cells are the header. Raises `ValueError` if there is no table.
+    """
+    start = table_start(html)
+    if start == -1:
+        raise ValueError("No tables found")
+    parser = _FirstTableParser()
+    for i in range(start, len(html), chunk_size):
+        parser.feed(html[i:i + chunk_size])
+        if parser.done:
+            break
+    else:
+        parser.close()
+        parser._close_row()
+
+    head, body = parser.head, parser.body
+    if not head:
+        while body and all(cell.header for cell in body[0]):
+            head.append(body.pop(0))
+    header = _expand_spans(head)[-1] if head else []
+    return WikiTable(header, _expand_spans(body))
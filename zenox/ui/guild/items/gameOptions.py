@@ -74,6 +74,6 @@ class TestButton(Button["GuildSettingsUI"]):
     
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=False, thinking=True)
-        special_program = SpecialProgram(self.view.game, "Zenox")
+        special_program = await SpecialProgram.fetch(self.view.game, "Zenox")
         _, embed, attachments = await special_program.buildMessage(interaction.client, self.view.settings.language)
         await interaction.followup.send(embed=embed, files=attachments)
\ No newline at end of file
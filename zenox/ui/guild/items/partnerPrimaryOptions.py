@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING
 from zenox.ui.components import Button, Modal, TextInput
 from zenox.l10n import LocaleStr
 from zenox.bot.bot import Zenox
+from zenox.db.mongodb import ASYNC_DB
 from zenox.static.embeds import Embed
 
 if TYPE_CHECKING:
@@ -19,7 +20,8 @@ async def updatePartnerList(client: Zenox):
         color=discord.Color.green()
     )
     
-    for partner in client.db.guilds.find({"flags": "PARTNER_GUILD"}, {"partnerData": 1, "_id": 0}).sort("partnerData.guildName", pymongo.ASCENDING):
+    partners = await ASYNC_DB.guilds.find({"flags": "PARTNER_GUILD"}, {"partnerData": 1, "_id": 0}, sort=[("partnerData.guildName", pymongo.ASCENDING)])
+    for partner in partners:
         if not all(x for x in partner["partnerData"].values()):
             continue
         
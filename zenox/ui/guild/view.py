@@ -1,5 +1,4 @@
 import discord
-import pathlib
 from discord import Locale, Member, User
 
 from .items.primaryOptions import LanguageSelector, GameSelector, SupportApprove, PartnerMenu, SupportButton
@@ -10,6 +9,7 @@ from .items.partnerPrimaryOptions import *
 from ..components import View, GoBackButton
 from ...static.utils import path_to_bytesio
 from ...static.embeds import DefaultEmbed
+from ...static.assets import ASSETS
 from ...static.enums import Game
 from ...db.structures import GuildConfig, CodesConfig, EventReminderConfig, SpecialProgram
 from ...static.constants import _supportCache as _cache
@@ -39,7 +39,7 @@ class GuildSettingsUI(View):
     @staticmethod
     def get_brand_image_filename(theme: str, locale: discord.Locale) -> str:
         filename = f"zenox-assets/assets/brand/{theme}-{locale.value}.png"
-        if not pathlib.Path(filename).exists():
+        if not ASSETS.exists(filename):
             return f"zenox-assets/assets/brand/{theme}-en-US.png"
         return filename
 
@@ -52,7 +52,7 @@ class GuildSettingsUI(View):
         theme = "DARK"
         filename = self.get_brand_image_filename(theme, self.settings.language)
         self.filepath = filename
-        return discord.File(filename, filename="brand.png")
+        return ASSETS.file(filename, "brand.png")
 
     def save_setting(self, dataType: CodesConfig | EventReminderConfig, changed_key: str, value: any) -> None:
         self.settings.updateGameConfigValue(self.game, dataType, changed_key, value)
@@ -78,7 +78,7 @@ class GuildSettingsUI(View):
                 self.add_item(ConfigChannelSelect(self.settings.codes_config[game].channel))
                 self.add_item(pingPreferences(disabled=CHANNEL_DISABLED_STATE, custom_id="ping_preferences_button"))
                 self.add_item(codePreferences(disabled=CHANNEL_DISABLED_STATE, custom_id="code_preferences_button"))
-                self.add_item(StreamReminderToggle(self.settings.event_reminders[game].config["streams"]))
+                self.add_item(StreamReminderToggle(self.settings.event_reminders[game].streams))
                 self.add_item(TestButton())
             
             case 'PingPreferences':
@@ -1,14 +1,16 @@
 import discord
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 from ...components import View, Button, Modal, TextInput, GoBackButton
 from discord import User, Member
 from discord import Locale
-from zenox.db.mongodb import DB, ANALYTICSDB
+from zenox.db.mongodb import ASYNC_DB, ASYNC_ANALYTICSDB
 from zenox.db.structures import SpecialProgram, GuildConfig, Game, CodesConfig
+from zenox.db.subscriptions import SUBSCRIPTIONS, Subscription
 from zenox.l10n import Translator, LocaleStr
 from zenox.static import emojis
 from zenox.bot.bot import Zenox
-from zenox.static.utils import path_to_bytesio
+from zenox.bot.broadcast import Broadcast, BroadcastResult
+from zenox.static.constants import ZENOX_LOCALES
 
 if TYPE_CHECKING:
     from ..view import HoyolabCodesUI
@@ -35,7 +37,7 @@ class confirmButton(Button["HoyolabCodesUI"]):
             await interaction.followup.send("Successfully published codes to Guild" if res else "Failed to publish codes to Guild")
         else:
             await interaction.followup.send(f"Successfully published codes to {_success} guilds\nFailed to publish codes to {_failed} guilds\nFailed to publish to {_forbidden} guilds due to missing permissions\nFailed to publish to {_no_channel} guilds due to missing channels\nMissing role in {_no_role} guilds")
-            ANALYTICSDB.hoyolab_codes.insert_one({
+            await ASYNC_ANALYTICSDB.hoyolab_codes.insert_one({
                 "type": "publish",
                 "game": self.view.data.game,
                 "version": self.view.data.version,
@@ -50,16 +52,27 @@ class confirmButton(Button["HoyolabCodesUI"]):
 
         await self.view.rebuild_ui(interaction, menu="main", back_button=False)
     
-    def _pre_translate(self):
-        raise NotImplementedError
+    def _pre_translate(self) -> dict[Locale, dict[str, Any]]:
+        """Render the announcement once per locale, every guild with the same language shares it"""
+        _translations: dict[Locale, dict[str, Any]] = {}
+        for language in ZENOX_LOCALES:
+            _translations[language] = {
+                "title": LocaleStr(key="wikicodes_embed.title").translate(language),
+                "norole": LocaleStr(key="role_not_found_error").translate(language),
+                "embed": self.view.data.buildEmbed(language),
+                "view": self.view.data.buildView(language)
+            }
+        return _translations
 
     async def publishToGuild(self, client: Zenox, guild_id: int) -> bool:
         # Only used for publishing to a single guild
         try:
             role = None 
-            guild = GuildConfig(guild_id)
+            guild = await GuildConfig.fetch(guild_id)
             guildObject = client.get_guild(guild.id)
             LANG = guild.language
+            if guildObject is None or guildObject.unavailable:
+                return False
             if not guild.codes_config[self.view.data.game].channel:
                 return False
             CHANNEL = guildObject.get_channel(guild.codes_config[self.view.data.game].channel)
@@ -82,39 +95,36 @@ class confirmButton(Button["HoyolabCodesUI"]):
             return False
 
     async def publishSpecialProgramCodes(self, client: Zenox) ->  tuple[int, int, int, int, int]:
-        _success, _failed, _forbidden, _no_channel, _no_role = 0, 0, 0, 0, 0
-        guilds = [guild["id"] for guild in DB.guilds.find({})]
+        game = self.view.data.game
+        TOTAL_GUILDS = await ASYNC_DB.guilds.count_documents({})
+        _translations = self._pre_translate()
+        embeds, thumbnail_files = await client.uploads.thumbnail(game, {language: _translations[language]["embed"] for language in _translations})
+
+        async def send(broadcast: Broadcast[Subscription], guild: Subscription) -> BroadcastResult:
+            role = None
+            guildObject = client.get_guild(guild.guild_id)
+            if guildObject is None or guildObject.unavailable: # Not cached (yet), keep its config for the next run
+                return "failed"
+            LANG = guild.language
+            CHANNEL = guildObject.get_channel(guild.channel_id)
+            if not CHANNEL:
+                (await GuildConfig.fetch(guild.guild_id)).updateGameConfigValue(game, CodesConfig, "channel", None)
+                return "no_channel"
+            warning = None
+            if guild.role_ping:
+                role = guildObject.get_role(guild.role_ping)
+                if not role:
+                    broadcast.incr("no_role")
+                    warning = _translations[LANG]["norole"]
+                    (await GuildConfig.fetch(guild.guild_id)).updateGameConfigValue(game, CodesConfig, "role_ping", None)
+            content = f"{emojis.ANNOUNCEMENT} {'@everyone' if guild.everyone_ping else ''} {role.mention if role else ''} **{_translations[LANG]['title']}** {warning if warning else ''}"
+            await broadcast.send(CHANNEL, content=content, embed=embeds[LANG], view=_translations[LANG]["view"], files=thumbnail_files())
+            return "success"
 
-        for guild in guilds:
-            try:
-                role = None
-                guild = GuildConfig(guild)
-                guildObject = client.get_guild(guild.id)
-                LANG = guild.language
-                if not guild.codes_config[self.view.data.game].channel:
-                    _no_channel += 1
-                    continue
-                CHANNEL = guildObject.get_channel(guild.codes_config[self.view.data.game].channel)
-                if not CHANNEL:
-                    guild.updateGameConfigValue(self.view.data.game, CodesConfig, "channel", None)
-                    continue
-                warning = None
-                if guild.codes_config[self.view.data.game].role_ping:
-                    role = guildObject.get_role(guild.codes_config[self.view.data.game].role_ping)
-                    if not role:
-                        _no_role += 1
-                        warning = LocaleStr(key="role_not_found_error").translate(LANG)
-                        guild.updateGameConfigValue(self.view.data.game, CodesConfig, "role_ping", None)
-                new_codes = LocaleStr(key="wikicodes_embed.title").translate(LANG)
-                content = f"{emojis.ANNOUNCEMENT} {'@everyone' if guild.codes_config[self.view.data.game].everyone_ping else ''} {role.mention if role else ''} **{new_codes}** {warning if warning else ''}"
-                view, embed, files = await self.view.data.buildMessage(client, LANG)
+        async def forbidden(guild: Subscription) -> None:
+            (await GuildConfig.fetch(guild.guild_id)).updateGameConfigValue(game, CodesConfig, "channel", None)
 
-                await CHANNEL.send(content=content, embed=embed, view=view, files=files)
-                _success += 1
-            except (discord.Forbidden, AttributeError):
-                guild.updateGameConfigValue(self.view.data.game, CodesConfig, "channel", None)
-                _forbidden += 1
-            except Exception as e:
-                client.capture_exception(e)
-                _failed += 1
-        return _success, _failed, _forbidden, _no_channel, _no_role
\ No newline at end of file
+        broadcast: Broadcast[Subscription] = Broadcast(client)
+        results = await broadcast.run(await SUBSCRIPTIONS.code_subscribers(game), send, on_forbidden=forbidden)
+        results["no_channel"] += max(TOTAL_GUILDS - broadcast.processed, 0) # Only subscribed guilds are visited
+        return results["success"], results["failed"], results["forbidden"], results["no_channel"], results["no_role"]
@@ -1,11 +1,12 @@
 import discord
-import pathlib
 from discord import Locale, Member, User
 
 from .items.primaryOptions import LanguageSelector, DarkModeToggle                                                                                                                       
 from ..components import View
 from ...static.embeds import DefaultEmbed
+from ...static.assets import ASSETS
 from zenox.db.structures import UserSettings, UserConfig
+from zenox.db.mongodb import run_in_executor
 
 class UserSettingsUI(View):
     def __init__(
@@ -24,7 +25,7 @@ class UserSettingsUI(View):
     @staticmethod
     def get_brand_image_filename(theme: str, locale: discord.Locale) -> str:
         filename = f"zenox-assets/assets/brand/{theme}-{locale.value}.png"
-        if not pathlib.Path(filename).exists():
+        if not ASSETS.exists(filename):
             return f"zenox-assets/assets/brand/{theme}-en-US.png"
         return filename
 
@@ -36,7 +37,7 @@ class UserSettingsUI(View):
     def get_brand_image_file(self) -> discord.File:
         theme = "DARK" if self.settings.dark_mode else "LIGHT"
         filename = self.get_brand_image_filename(theme, self.settings.language)
-        return discord.File(filename, filename="brand.png")
+        return ASSETS.file(filename, "brand.png")
     
     async def update_ui_and_save_settings(self, interaction: discord.Interaction, *, translate: bool = False) -> None:
         if translate:
@@ -49,4 +50,5 @@ class UserSettingsUI(View):
         )
 
         # Update Settings
-        config = UserConfig(interaction.user.id).updateSettings(self.settings)
\ No newline at end of file
+        config = await UserConfig.fetch(interaction.user.id)
+        await run_in_executor(config.updateSettings, self.settings)
\ No newline at end of file